@@ -0,0 +1,169 @@
+import argparse
+import json
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urljoin
+
+from http_client import AuthSettings, ConnectionSettings, get_session, send_request
+from instrumentation import track_request
+from openapi_manager import download_endpoint_index
+from request_builder import build_headers, prepare_request_body, url_builder
+from schema_validation import validate_response
+from service_policy import policy_gate
+from service_registry import load_service_registry
+
+DEFAULT_CONCURRENCY = 16
+MAX_REPORTED_SCHEMA_ERRORS = 5
+
+
+def iter_definitions(stream):
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            definition = json.loads(line)
+        except ValueError as e:
+            # A bad line is reported in its own result instead of ending the batch.
+            definition = e
+        yield line_number, definition
+
+
+def split_params(path_template, params):
+    path_params = {k: v for k, v in params.items() if f"{{{k}}}" in path_template}
+    query_params = {k: v for k, v in params.items() if k not in path_params}
+    return path_params, query_params
+
+
+class BatchRunner:
+    def __init__(self, base_url, concurrency=DEFAULT_CONCURRENCY, timeout=30, auth=None, load_specs=True):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.load_specs = load_specs
+        self.session = get_session(base_url, ConnectionSettings(pool_size=concurrency), auth)
+        self.gated_session = get_session(base_url, ConnectionSettings(pool_size=concurrency), auth, gated=True)
+        self.services = load_service_registry()
+        self._indexes = {}
+        self._indexes_lock = threading.Lock()
+
+    def endpoint_index(self, service):
+        if not self.load_specs or service not in self.services:
+            return None
+        with self._indexes_lock:
+            if service in self._indexes:
+                return self._indexes[service]
+            try:
+                self._indexes[service] = download_endpoint_index(self.services[service], self.base_url)
+            except Exception as e:
+                print(f"Could not load OpenAPI spec for {service}: {e}", file=sys.stderr)
+                self._indexes[service] = None
+            return self._indexes[service]
+
+    def prepare(self, definition):
+        method = definition.get("method", "GET").upper()
+        path = definition["path"]
+        path_params, query_params = split_params(path, definition.get("params", {}))
+        headers = build_headers(definition.get("headers"), definition.get("partition_id", ""))
+
+        json_data = definition.get("body")
+        index = self.endpoint_index(definition.get("service"))
+        endpoint = index.find(method, path) if index else None
+        if endpoint is not None and isinstance(json_data, dict):
+            json_data = prepare_request_body(json_data, endpoint)
+
+        builder = endpoint.url_builder if endpoint is not None else url_builder(path)
+        url = urljoin(self.base_url, builder.build(path_params, query_params))
+        return method, url, headers, json_data, endpoint
+
+    def gate(self, service):
+        definition = self.services.get(service)
+        return policy_gate(service, definition.policy, self.base_url) if definition is not None else None
+
+    def execute(self, line_number, definition):
+        if not isinstance(definition, dict):
+            error = f"invalid JSON: {definition}" if isinstance(definition, ValueError) else \
+                "request definition must be a JSON object"
+            return {"line": line_number, "id": None, "error": error}
+        result = {"line": line_number, "id": definition.get("id")}
+        try:
+            method, url, headers, json_data, endpoint = self.prepare(definition)
+            result.update(method=method, url=url)
+            gate = self.gate(definition.get("service"))
+            session = self.session if gate is None else self.gated_session
+            # The timing restarts on each gated attempt, so policy waits stay out of the latency.
+            with track_request() as timing:
+                response = send_request(session, method, url, headers, json_data, timeout=self.timeout, gate=gate)
+            size = len(response.content)
+            timing.finish(0)
+            result.update(
+                status=response.status_code,
+                latency_ms=round(timing.total_ms, 3),
+                size=size,
+            )
+            if endpoint is not None and endpoint.responses and "json" in response.headers.get("Content-Type", ""):
+                schema_errors = validate_response(endpoint.responses, response.status_code, response.json())
+                if schema_errors is not None:
+                    result["schema_errors"] = len(schema_errors)
+                    result["schema_violations"] = [
+                        {"path": path, "message": message}
+                        for path, message in schema_errors[:MAX_REPORTED_SCHEMA_ERRORS]
+                    ]
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    def run(self, definitions, on_result):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = set()
+            for line_number, definition in definitions:
+                if len(pending) >= self.concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        on_result(future.result())
+                pending.add(pool.submit(self.execute, line_number, definition))
+            for future in wait(pending).done:
+                on_result(future.result())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a JSONL file of API requests without the Streamlit UI.")
+    parser.add_argument("input", help="JSONL file of request definitions, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for results, or '-' for stdout")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--token", default="")
+    parser.add_argument("--auth-method", choices=["header", "cookie"], default="header")
+    parser.add_argument("--no-spec", action="store_true", help="Send bodies as-is instead of coercing them with the service spec")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    runner = BatchRunner(
+        args.base_url,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        auth=AuthSettings(method=args.auth_method, token=args.token),
+        load_specs=not args.no_spec,
+    )
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    sink = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        def write_result(result):
+            sink.write(json.dumps(result) + "\n")
+            sink.flush()
+
+        runner.run(iter_definitions(source), write_result)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
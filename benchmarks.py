@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from main import generate_default_json_from_schema
+from openapi_manager import process_openapi_spec
+from request_builder import build_full_url, prepare_request_body, process_param_value
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+DEFAULT_DEPTH = 8
+DEFAULT_REPEAT = 3
+METHODS = ("get", "post", "put", "patch", "delete")
+SAMPLE_VALUES = {"string": "value", "integer": "42", "number": "4.2", "boolean": "true",
+                 "array": "a, b, c", "object": '{"nested": true}'}
+
+
+def synthetic_spec(operations, depth=DEFAULT_DEPTH):
+    schemas = {}
+    chains = max(1, operations // depth)
+    for chain in range(chains):
+        for level in range(depth):
+            name = f"Model{chain}_{level}"
+            properties = {
+                "id": {"type": "integer"},
+                "name": {"type": "string", "minLength": 1},
+                "ratio": {"type": "number"},
+                "active": {"type": "boolean"},
+                "labels": {"type": "array", "items": {"type": "string"}},
+                "metadata": {"type": "object"},
+            }
+            if level + 1 < depth:
+                properties["child"] = {"$ref": f"#/components/schemas/Model{chain}_{level + 1}"}
+                properties["children"] = {"type": "array", "items": {"$ref": f"#/components/schemas/Model{chain}_{level + 1}"}}
+            else:
+                properties["root"] = {"$ref": f"#/components/schemas/Model{chain}_0"}
+            schemas[name] = {
+                "allOf": [{"$ref": "#/components/schemas/Base"}, {"type": "object", "properties": properties}],
+            }
+    schemas["Base"] = {"type": "object", "required": ["id"], "properties": {"created": {"type": "string", "format": "date-time"}}}
+
+    paths = {}
+    for i in range(operations):
+        method = METHODS[i % len(METHODS)]
+        path = f"/resources{i // len(METHODS)}/{{resourceId}}/items"
+        model = {"$ref": f"#/components/schemas/Model{i % chains}_0"}
+        operation = {
+            "operationId": f"op{i}",
+            "tags": [f"tag{i % 20}"],
+            "summary": f"Operation {i}",
+            "parameters": [
+                {"name": "limit", "in": "query", "schema": {"type": "integer"}},
+                {"name": "filter", "in": "query", "schema": {"type": "string"}},
+            ],
+            "responses": {"200": {"description": "ok", "content": {"application/json": {"schema": model}}}},
+        }
+        if method in ("post", "put", "patch"):
+            operation["requestBody"] = {"content": {"application/json": {"schema": model}}}
+        paths.setdefault(path, {"parameters": [{"name": "resourceId", "in": "path", "required": True,
+                                                "schema": {"type": "string"}}]})[method] = operation
+
+    return {"openapi": "3.0.0", "info": {"title": "synthetic", "version": "1"}, "paths": paths,
+            "components": {"schemas": schemas}}
+
+
+def body_schema(endpoint):
+    return endpoint.request_body.get("content", {}).get("application/json", {}).get("schema", {})
+
+
+def string_body(endpoint):
+    properties = body_schema(endpoint).get("properties", {})
+    return {name: SAMPLE_VALUES.get(prop.get("type", "string"), "value") for name, prop in properties.items()}
+
+
+def stages(spec):
+    index = process_openapi_spec(spec)
+    body_endpoints = [endpoint for endpoint in index if endpoint.request_body]
+    bodies = [(endpoint, string_body(endpoint)) for endpoint in body_endpoints]
+
+    def default_json():
+        for endpoint in body_endpoints:
+            generate_default_json_from_schema(body_schema(endpoint))
+
+    def full_urls():
+        for endpoint in index:
+            build_full_url(endpoint.path, {"resourceId": "abc-123"}, {"limit": 10, "filter": "name eq 'x'"})
+
+    def compiled_urls():
+        for endpoint in index:
+            endpoint.url_builder.build({"resourceId": "abc-123"}, {"limit": 10, "filter": "name eq 'x'"})
+
+    def request_bodies():
+        for endpoint, body in bodies:
+            prepare_request_body(body, endpoint)
+
+    def param_values():
+        for endpoint, body in bodies:
+            for name, value in body.items():
+                process_param_value(name, value, endpoint)
+
+    return {
+        "process_openapi_spec": lambda: process_openapi_spec(spec),
+        "generate_default_json_from_schema": default_json,
+        "build_full_url": full_urls,
+        "url_builder": compiled_urls,
+        "prepare_request_body": request_bodies,
+        "process_param_value": param_values,
+    }
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    # Measured in a separate pass so tracemalloc's overhead doesn't show up in the timings.
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds_min": min(timings), "seconds_median": statistics.median(timings), "peak_kib": peak / 1024}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=DEFAULT_SIZES, depth=DEFAULT_DEPTH, repeat=DEFAULT_REPEAT, only=None):
+    results = []
+    for operations in sizes:
+        spec = synthetic_spec(operations, depth)
+        for stage, fn in stages(spec).items():
+            if only and stage not in only:
+                continue
+            result = {"operations": operations, "depth": depth, "stage": stage, **measure(fn, repeat)}
+            results.append(result)
+            print(f"{operations:>6} ops  {stage:36} {result['seconds_median'] * 1000:10.2f} ms "
+                  f"{result['peak_kib']:12.1f} KiB peak", file=sys.stderr)
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.time(),
+        "results": results,
+    }
+
+
+def compare(baseline, current):
+    previous = {(r["operations"], r["depth"], r["stage"]): r for r in baseline["results"]}
+    lines = [f"Comparing {current.get('revision')} against {baseline.get('revision')}"]
+    for result in current["results"]:
+        before = previous.get((result["operations"], result["depth"], result["stage"]))
+        if before is None:
+            continue
+        time_ratio = result["seconds_median"] / before["seconds_median"] if before["seconds_median"] else float("inf")
+        memory_ratio = result["peak_kib"] / before["peak_kib"] if before["peak_kib"] else float("inf")
+        lines.append(f"{result['operations']:>6} ops  {result['stage']:36} time x{time_ratio:6.2f}  memory x{memory_ratio:6.2f}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark spec processing and request building on synthetic specs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Operation counts to test")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="Length of each $ref chain")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--stage", action="append", help="Only run the named stage (repeatable)")
+    parser.add_argument("-o", "--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Results file from an earlier run to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    current = run(args.sizes, args.depth, args.repeat, args.stage)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(json.load(f), current))
+
+
+if __name__ == "__main__":
+    main()
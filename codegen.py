@@ -0,0 +1,430 @@
+import argparse
+import inspect
+import json
+import keyword
+import os
+import pprint
+import re
+import sys
+from dataclasses import dataclass
+from urllib.parse import quote
+
+import request_builder
+from fuzzer import CaseGenerator, json_body_schema
+from http_client import BODY_METHODS
+from openapi_manager import download_endpoint_index
+from service_registry import load_service_registry
+
+RESERVED_NAMES = {"self", "headers", "body", "path", "query", "request", "close"}
+WORD_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+NON_WORD = re.compile(r"\W+")
+
+# The generated client vendors the runtime's own encoders so it builds exactly
+# the URLs and bodies the app does.
+VENDORED_FUNCTIONS = (
+    request_builder._quote,
+    request_builder._escape,
+    request_builder.serialize_path_value,
+    request_builder.serialize_query_value,
+    request_builder.coerce_value,
+)
+
+CLIENT_PRELUDE = '''import json
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+UNRESERVED = re.compile(r"[A-Za-z0-9_.~-]*")
+ASCII_ESCAPES = {i: f"%{i:02X}" for i in range(128) if not UNRESERVED.fullmatch(chr(i))}
+QUERY_DELIMITERS = {"form": ",", "spaceDelimited": "%20", "pipeDelimited": "|"}
+'''
+
+CLIENT_HELPERS = '''
+
+def _path(style, explode, is_array, name, value):
+    if value is None:
+        return f"{{{name}}}"
+    if is_array and isinstance(value, str):
+        value = [item.strip() for item in value.split(",")]
+    if style == "simple" and not isinstance(value, (list, tuple, dict)):
+        return _quote(value)
+    return serialize_path_value(style, explode, name, value)
+
+
+def _query(parts, style, explode, is_array, name, value):
+    if value is None or value == "":
+        return
+    if is_array and isinstance(value, str):
+        value = [item.strip() for item in value.split(",")]
+    if style == "form" and not isinstance(value, (list, tuple, dict)):
+        parts.append(f"{name}={_quote(value)}")
+    else:
+        serialize_query_value(style, explode, name, value, parts)
+
+
+def _body(body, property_types):
+    if not isinstance(body, dict):
+        return body
+    return {
+        name: coerce_value(property_types.get(name, "string"), value)
+        for name, value in body.items()
+        if value is not None and value != ""
+    }
+
+
+class Client:
+    def __init__(self, base_url=BASE_URL, headers=None, partition_id=PARTITION_ID, timeout=30, pool_size=10,
+                 session=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept": "application/json", **(headers or {})})
+        if partition_id:
+            self.session.headers["data-partition-id"] = partition_id
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def request(self, method, path, query=None, body=None, headers=None):
+        url = self.base_url + path
+        if query:
+            url = f"{url}?{'&'.join(query)}"
+        return self.session.request(method, url, json=body, headers=headers, timeout=self.timeout)
+'''
+
+SUITE_TEMPLATE = '''import argparse
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from {module} import BASE_URL, Client
+
+BASE_URL = os.environ.get("API_BASE_URL", BASE_URL)
+BENCHMARK_ROUNDS = int(os.environ.get("API_BENCHMARK_ROUNDS") or 0)
+
+CASES = [
+{cases}
+]
+
+
+def check_status(case, status_code):
+    return status_code in case["expected"] if case["expected"] else status_code < 500
+
+
+def call(client, case):
+    return getattr(client, case["function"])(*case["args"], **case["kwargs"])
+
+
+@pytest.fixture(scope="module")
+def client():
+    with Client(BASE_URL) as client:
+        yield client
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["id"] for case in CASES])
+def test_request(client, case):
+    response = call(client, case)
+    assert check_status(case, response.status_code), f"{{case['id']}}: unexpected status {{response.status_code}}"
+
+
+async def benchmark(cases, concurrency=16, rounds=10, base_url=BASE_URL):
+    latencies = {{case["id"]: [] for case in cases}}
+    failures = 0
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with Client(base_url, pool_size=concurrency) as client:
+        async def run(case):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await loop.run_in_executor(None, call, client, case)
+                    ok = check_status(case, response.status_code)
+                except requests.RequestException:
+                    ok = False
+                latencies[case["id"]].append(time.perf_counter() - started)
+                failures += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(case) for _ in range(rounds) for case in cases))
+    return latencies, failures, time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+@pytest.mark.skipif(not BENCHMARK_ROUNDS, reason="set API_BENCHMARK_ROUNDS to benchmark")
+def test_benchmark():
+    _, failures, _ = asyncio.run(benchmark(CASES, rounds=BENCHMARK_ROUNDS))
+    assert failures == 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the recorded requests.")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    latencies, failures, elapsed = asyncio.run(benchmark(CASES, args.concurrency, args.rounds, args.base_url))
+    total = sum(map(len, latencies.values()))
+    print(f"{{total}} requests in {{elapsed:.2f}} s ({{total / elapsed:.0f}}/s), {{failures}} failures")
+    for case_id, values in latencies.items():
+        print(f"{{case_id:40}} p50 {{statistics.median(values) * 1000:8.2f}} ms  "
+              f"p90 {{percentile(values, 0.9) * 1000:8.2f}} ms  max {{max(values) * 1000:8.2f}} ms")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
+'''
+
+
+@dataclass(frozen=True)
+class ClientFunction:
+    endpoint: object
+    name: str
+    path_args: tuple
+    query_args: tuple
+
+
+def python_name(text, taken=(), fallback="value"):
+    name = NON_WORD.sub("_", WORD_BOUNDARY.sub("_", text or "")).strip("_").lower() or fallback
+    if name[0].isdigit():
+        name = f"_{name}"
+    if keyword.iskeyword(name) or name in RESERVED_NAMES:
+        name = f"{name}_"
+    candidate, suffix = name, 1
+    while candidate in taken:
+        suffix += 1
+        candidate = f"{name}_{suffix}"
+    return candidate
+
+
+def module_name(service_name):
+    return f"{python_name(service_name, fallback='service')}_client"
+
+
+def client_functions(endpoint_index):
+    functions, taken = [], set()
+    for endpoint in endpoint_index:
+        name = python_name(endpoint.operation_id or f"{endpoint.method} {endpoint.path}", taken)
+        taken.add(name)
+        arguments = set()
+        path_args, query_args = [], []
+        for parameters, target in ((endpoint.path_params, path_args), (endpoint.query_params, query_args)):
+            for parameter in parameters:
+                argument = python_name(parameter.get("name"), arguments)
+                arguments.add(argument)
+                target.append((parameter, argument))
+        functions.append(ClientFunction(endpoint, name, tuple(path_args), tuple(query_args)))
+    return functions
+
+
+def body_property_types(endpoint):
+    schema = endpoint.request_body.get("content", {}).get("application/json", {}).get("schema", {}) \
+        if endpoint.request_body else {}
+    return {name: prop.get("type", "string") for name, prop in schema.get("properties", {}).items()}
+
+
+def _path_expression(function):
+    arguments = {parameter["name"]: (parameter, argument) for parameter, argument in function.path_args}
+    pieces = []
+    for literal, name in _segments(function.endpoint.path):
+        if literal:
+            pieces.append(repr(literal))
+        if name is None:
+            continue
+        if name not in arguments:
+            pieces.append(repr(f"{{{name}}}"))
+            continue
+        parameter, argument = arguments[name]
+        style, explode, is_array = request_builder._style(parameter, "simple")
+        pieces.append(f"_path({style!r}, {explode!r}, {is_array!r}, {name!r}, {argument})")
+    return " + ".join(pieces) or "''"
+
+
+def _segments(path_template):
+    builder = request_builder.UrlBuilder(path_template)
+    builder._compile()
+    return builder.segments
+
+
+def _method_source(function, body_types_name):
+    endpoint = function.endpoint
+    signature = ["self", *(argument for _, argument in function.path_args), "*"]
+    signature += [f"{argument}=None" for _, argument in function.query_args]
+    has_body = endpoint.method in BODY_METHODS
+    if has_body:
+        signature.append("body=None")
+    signature.append("headers=None")
+
+    summary = f"{endpoint.key} - {endpoint.summary}" if endpoint.summary else endpoint.key
+    lines = [
+        f"    def {function.name}({', '.join(signature)}):",
+        f'        """{summary}"""' if summary.isprintable() and '"' not in summary and "\\" not in summary
+        else f"        {summary!r}",
+        f"        path = {_path_expression(function)}",
+        "        query = []" if function.query_args else "        query = None",
+    ]
+    for parameter, argument in function.query_args:
+        style, explode, is_array = request_builder._style(parameter, "form")
+        encoded_name = quote(str(parameter["name"]), safe="")
+        lines.append(f"        _query(query, {style!r}, {explode!r}, {is_array!r}, {encoded_name!r}, {argument})")
+    body = f"_body(body, {body_types_name})" if has_body else "None"
+    lines.append(f"        return self.request({endpoint.method!r}, path, query, {body}, headers)")
+    return "\n".join(lines)
+
+
+def generate_client(endpoint_index, service_name, base_url="", partition_id=""):
+    functions = client_functions(endpoint_index)
+    parts = [
+        f'"""Client for {service_name}, generated by codegen.py from spec {endpoint_index.spec_hash}."""\n',
+        CLIENT_PRELUDE,
+        f"\nBASE_URL = {base_url!r}\nPARTITION_ID = {partition_id!r}\n",
+        "BODY_TYPES = " + pprint.pformat(
+            {function.name: body_property_types(function.endpoint) for function in functions
+             if body_property_types(function.endpoint)}, sort_dicts=False, width=110) + "\n",
+    ]
+    for fn in VENDORED_FUNCTIONS:
+        parts.append("\n\n" + inspect.getsource(fn).rstrip() + "\n")
+    parts.append(CLIENT_HELPERS)
+    for function in functions:
+        body_types = f"BODY_TYPES[{function.name!r}]" if body_property_types(function.endpoint) else "{}"
+        parts.append("\n" + _method_source(function, body_types) + "\n")
+    return "".join(parts)
+
+
+def _literal(value):
+    # Values recorded from the UI or generated from schemas are JSON data;
+    # anything else (e.g. dates parsed from YAML) is written out as a string.
+    return json.loads(json.dumps(value, default=str))
+
+
+def expected_statuses(endpoint):
+    responses = endpoint.responses or {}
+    if "default" in responses:
+        return []
+    statuses = []
+    for code in responses:
+        if code.isdigit():
+            statuses.append(int(code))
+        elif len(code) == 3 and code[0].isdigit() and code[1:].upper() == "XX":
+            statuses.extend(range(int(code[0]) * 100, int(code[0]) * 100 + 100))
+    return sorted(statuses)
+
+
+def default_cases(endpoint_index, seed=0):
+    generator = CaseGenerator(seed)
+    cases = []
+    for endpoint in endpoint_index:
+        body_schema = json_body_schema(endpoint)
+        cases.append({
+            "endpoint": endpoint.key,
+            "path_params": {p["name"]: generator.valid(p.get("schema", {})) for p in endpoint.path_params},
+            "query_params": {p["name"]: generator.valid(p.get("schema", {})) for p in endpoint.query_params
+                             if p.get("required")},
+            "headers": {},
+            "body": generator.valid(body_schema) if body_schema is not None else None,
+        })
+    return cases
+
+
+def suite_cases(endpoint_index, cases):
+    functions = {function.endpoint.key: function for function in client_functions(endpoint_index)}
+    counts = {}
+    rendered = []
+    for case in cases:
+        function = functions.get(case["endpoint"])
+        if function is None:
+            continue
+        counts[function.name] = counts.get(function.name, 0) + 1
+        kwargs = {
+            argument: case["query_params"][parameter["name"]]
+            for parameter, argument in function.query_args
+            if case.get("query_params", {}).get(parameter["name"]) not in (None, "")
+        }
+        if case.get("body") is not None:
+            kwargs["body"] = case["body"]
+        if case.get("headers"):
+            kwargs["headers"] = case["headers"]
+        rendered.append(_literal({
+            "id": f"{function.name}-{counts[function.name]}",
+            "function": function.name,
+            "args": [case.get("path_params", {}).get(parameter["name"]) for parameter, _ in function.path_args],
+            "kwargs": kwargs,
+            "expected": expected_statuses(function.endpoint),
+        }))
+    return rendered
+
+
+def generate_suite(endpoint_index, service_name, cases):
+    rendered = ",\n".join(
+        "    " + pprint.pformat(case, sort_dicts=False, width=116).replace("\n", "\n    ")
+        for case in suite_cases(endpoint_index, cases)
+    )
+    header = f'"""Tests and benchmarks for {service_name}, generated by codegen.py. Run with pytest, or run this file ' \
+             f'to benchmark."""\n'
+    return header + SUITE_TEMPLATE.format(module=module_name(service_name), cases=rendered)
+
+
+def generate(endpoint_index, service_name, base_url="", partition_id="", cases=None, seed=0):
+    name = module_name(service_name)
+    return {
+        f"{name}.py": generate_client(endpoint_index, service_name, base_url, partition_id),
+        f"test_{name}.py": generate_suite(endpoint_index, service_name, cases or default_cases(endpoint_index, seed)),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a Python client and a test/benchmark suite for a service.")
+    parser.add_argument("service", help="Service name from the service registry")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--partition-id", default="")
+    parser.add_argument("--cases", help="JSONL file of recorded requests to test; defaults to one generated case "
+                                        "per endpoint")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output-dir", default=".")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = load_service_registry()[args.service]
+    cases = None
+    if args.cases:
+        with open(args.cases) as f:
+            cases = [json.loads(line) for line in f if line.strip()]
+
+    files = generate(download_endpoint_index(service, args.base_url), service.name, args.base_url,
+                     args.partition_id, cases, args.seed)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for filename, source in files.items():
+        with open(os.path.join(args.output_dir, filename), "w") as f:
+            f.write(source)
+        print(os.path.join(args.output_dir, filename), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from dataclasses import dataclass, replace
+from urllib.parse import urljoin
+
+from json_diff import diff_json
+
+COMPARE_BODY_LIMIT = 16 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Target:
+    base_url: str
+    partition_id: str = None
+
+    @property
+    def label(self):
+        return f"{self.base_url} [{self.partition_id}]" if self.partition_id else self.base_url
+
+
+def target_request(request, path, target, gates=None):
+    headers = dict(request.headers or {})
+    if target.partition_id:
+        headers["data-partition-id"] = target.partition_id
+    gate = gates(target.base_url) if gates is not None else request.gate
+    return replace(request, url=urljoin(target.base_url, path), headers=headers, gate=gate)
+
+
+def _payload(result):
+    if result is None:
+        return None, "no response"
+    if "json" not in result.content_type:
+        return None, "not JSON"
+    if not 0 < result.body.size <= COMPARE_BODY_LIMIT:
+        return None, "empty" if not result.body.size else "too large to compare"
+    try:
+        return result.body.json(limit=COMPARE_BODY_LIMIT), None
+    except ValueError:
+        return None, "invalid JSON"
+
+
+class Comparison:
+    def __init__(self, targets, handles):
+        self.targets = targets
+        self.handles = handles
+        self._diffs = None
+
+    @property
+    def done(self):
+        return all(handle.done for handle in self.handles)
+
+    def cancel(self):
+        for handle in self.handles:
+            handle.cancel()
+
+    def close(self):
+        for handle in self.handles:
+            handle.close()
+
+    def summary(self):
+        baseline = self.handles[0].result()
+        rows = []
+        for target, handle in zip(self.targets, self.handles):
+            result = handle.result()
+            row = {"Target": target.label, "Status": handle.state, "Latency (ms)": None, "vs baseline": None,
+                   "Size (bytes)": None}
+            if result is not None:
+                row["Status"] = result.status_code
+                row["Latency (ms)"] = round(result.elapsed_s * 1000, 1)
+                row["Size (bytes)"] = result.body.size
+                if baseline is not None and baseline.elapsed_s:
+                    row["vs baseline"] = f"x{result.elapsed_s / baseline.elapsed_s:.2f}"
+            elif handle.error() is not None:
+                row["Status"] = f"error: {handle.error()}"
+            rows.append(row)
+        return rows
+
+    def diffs(self):
+        # Bodies are parsed and diffed once; reruns of the page reuse the result.
+        if self._diffs is None:
+            baseline, problem = _payload(self.handles[0].result())
+            self._diffs = []
+            for target, handle in zip(self.targets[1:], self.handles[1:]):
+                payload, other_problem = _payload(handle.result())
+                if problem or other_problem:
+                    self._diffs.append((target, None, False, problem or other_problem))
+                    continue
+                changes, truncated = diff_json(baseline, payload)
+                self._diffs.append((target, changes, truncated, None))
+        return self._diffs
+
+
+def start_comparison(executor, sessions, request, path, targets, metrics_store=None, history_store=None, gates=None):
+    handles = [
+        executor.submit(sessions(target.base_url), target_request(request, path, target, gates), metrics_store,
+                        history_store)
+        for target in targets
+    ]
+    return Comparison(targets, handles)
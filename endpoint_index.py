@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+
+HTTP_METHODS = ("get", "post", "put", "delete", "patch")
+
+
+@dataclass(frozen=True, slots=True)
+class Endpoint:
+    key: str
+    path: str
+    method: str
+    operation_id: str
+    summary: str
+    description: str
+    tags: tuple
+    parameters: tuple
+    path_params: tuple
+    query_params: tuple
+    request_body: dict
+    responses: dict
+    security: tuple
+    url_builder: object = None
+
+    @property
+    def full_path(self):
+        return self.key
+
+
+class EndpointIndex:
+    def __init__(self, endpoints=(), spec_hash=None, resolver=None):
+        self.spec_hash = spec_hash
+        self.resolver = resolver
+        self.fingerprints = None
+        self.endpoints = tuple(endpoints)
+        self.by_key = {}
+        self.by_operation_id = {}
+        by_tag = {}
+        by_method = {}
+        by_path = {}
+
+        for endpoint in self.endpoints:
+            self.by_key[endpoint.key] = endpoint
+            if endpoint.operation_id:
+                self.by_operation_id[endpoint.operation_id] = endpoint
+            for tag in endpoint.tags:
+                by_tag.setdefault(tag, []).append(endpoint)
+            by_method.setdefault(endpoint.method, []).append(endpoint)
+            by_path.setdefault(endpoint.path, []).append(endpoint)
+
+        self.by_tag = {tag: tuple(items) for tag, items in by_tag.items()}
+        self.by_method = {method: tuple(items) for method, items in by_method.items()}
+        self.by_path = {path: tuple(items) for path, items in by_path.items()}
+        self.sorted_tags = tuple(sorted(self.by_tag))
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def __iter__(self):
+        return iter(self.endpoints)
+
+    def __bool__(self):
+        return bool(self.endpoints)
+
+    def get(self, key):
+        return self.by_key.get(key)
+
+    def find(self, method, path):
+        return self.by_key.get(f"{method.upper()} {path}")
@@ -0,0 +1,407 @@
+import argparse
+import json
+import random
+import re
+import string
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from urllib.parse import urljoin
+
+try:
+    import re._parser as sre_parse
+except ImportError:
+    import sre_parse
+
+from http_client import BODY_METHODS, AuthSettings, ConnectionSettings, get_session, send_request
+from openapi_manager import download_endpoint_index
+from request_builder import build_headers
+from schema_validation import response_schema, validate
+from service_policy import policy_gate
+from service_registry import load_service_registry
+
+MAX_DEPTH = 5
+# Required properties are always generated, so a schema that requires itself needs a hard stop.
+MAX_NESTING = MAX_DEPTH * 2
+MAX_ARRAY_ITEMS = 3
+MAX_REPEAT = 5
+DEFAULT_CONCURRENCY = 32
+WORD_CHARACTERS = string.ascii_letters + string.digits + "_"
+ARRAY_INDEX = re.compile(r"\[\d+\]")
+
+FORMAT_GENERATORS = {
+    "date": lambda rng: f"20{rng.randint(10, 30)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    "date-time": lambda rng: f"20{rng.randint(10, 30)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00Z",
+    "email": lambda rng: f"user{rng.randint(0, 9999)}@example.com",
+    "uuid": lambda rng: str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+    "uri": lambda rng: f"https://example.com/{rng.randint(0, 9999)}",
+    "hostname": lambda rng: f"host{rng.randint(0, 999)}.example.com",
+    "ipv4": lambda rng: ".".join(str(rng.randint(0, 255)) for _ in range(4)),
+    "ipv6": lambda rng: ":".join(f"{rng.getrandbits(16):x}" for _ in range(8)),
+}
+
+
+@dataclass
+class FuzzCase:
+    kind: str
+    description: str
+    path_params: dict
+    query_params: dict
+    body: object = None
+
+
+@dataclass
+class Failure:
+    endpoint: str
+    status_code: object
+    reason: str
+    count: int = 0
+    example: dict = field(default_factory=dict)
+
+
+class CaseGenerator:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self._edge_cases = {}
+
+    def valid(self, schema, depth=0):
+        rng = self.rng
+        if not isinstance(schema, dict):
+            return None
+        if depth >= MAX_NESTING:
+            return {} if schema.get("type", "object" if "properties" in schema else None) == "object" else None
+        if "const" in schema:
+            return schema["const"]
+        if schema.get("enum"):
+            return rng.choice(schema["enum"])
+        for key in ("oneOf", "anyOf"):
+            if schema.get(key):
+                return self.valid(rng.choice(schema[key]), depth + 1)
+
+        schema_type = schema.get("type", "object" if "properties" in schema else "string")
+        if isinstance(schema_type, list):
+            schema_type = rng.choice([t for t in schema_type if t != "null"] or ["null"])
+
+        if schema_type == "object":
+            result = {}
+            required = set(schema.get("required", []))
+            for name, prop in schema.get("properties", {}).items():
+                if name in required or (depth < MAX_DEPTH and rng.random() < 0.5):
+                    result[name] = self.valid(prop, depth + 1)
+            return result
+        if schema_type == "array":
+            low = schema.get("minItems", 0)
+            high = max(low, min(schema.get("maxItems", MAX_ARRAY_ITEMS), MAX_ARRAY_ITEMS if depth < MAX_DEPTH else low))
+            return [self.valid(schema.get("items", {}), depth + 1) for _ in range(rng.randint(low, high))]
+        if schema_type in ("integer", "number"):
+            return self._number(schema, schema_type == "integer")
+        if schema_type == "boolean":
+            return rng.random() < 0.5
+        if schema_type == "null":
+            return None
+        return self._string(schema)
+
+    def _number(self, schema, integer):
+        low = schema.get("minimum", -1000)
+        high = schema.get("maximum", max(low, 0) + 1000)
+        exclusive_min, exclusive_max = schema.get("exclusiveMinimum"), schema.get("exclusiveMaximum")
+        if exclusive_min is not None and not isinstance(exclusive_min, bool):
+            low = exclusive_min
+        if exclusive_max is not None and not isinstance(exclusive_max, bool):
+            high = exclusive_max
+        step = 1 if integer else 0.5
+        if exclusive_min is not None and exclusive_min is not False:
+            low += step
+        if exclusive_max is not None and exclusive_max is not False:
+            high -= step
+        if high < low:
+            high = low
+
+        value = self.rng.randint(int(low), int(high)) if integer else self.rng.uniform(low, high)
+        multiple = schema.get("multipleOf")
+        if multiple:
+            value = max(round(value / multiple), -(-low // multiple)) * multiple
+        return int(value) if integer else value
+
+    def _string(self, schema):
+        rng = self.rng
+        if schema.get("format") in FORMAT_GENERATORS:
+            return FORMAT_GENERATORS[schema["format"]](rng)
+        if schema.get("pattern"):
+            generated = self.from_pattern(schema["pattern"])
+            if generated is not None:
+                return generated
+        low = schema.get("minLength", 1)
+        high = max(low, min(schema.get("maxLength", low + 12), low + 12))
+        return "".join(rng.choice(string.ascii_letters) for _ in range(rng.randint(low, high)))
+
+    def from_pattern(self, pattern):
+        try:
+            return self._emit(sre_parse.parse(pattern))
+        except (re.error, ValueError, TypeError):
+            return None
+
+    def _emit(self, items):
+        rng = self.rng
+        out = []
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                out.append(chr(av))
+            elif op is sre_parse.NOT_LITERAL:
+                out.append(rng.choice([c for c in string.ascii_letters if ord(c) != av]))
+            elif op is sre_parse.ANY:
+                out.append(rng.choice(string.ascii_letters))
+            elif op is sre_parse.IN:
+                out.append(self._emit_set(av))
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+                low, high, sub = av
+                high = low + MAX_REPEAT if high is sre_parse.MAXREPEAT else min(high, low + MAX_REPEAT)
+                out.extend(self._emit(sub) for _ in range(rng.randint(low, high)))
+            elif op is sre_parse.SUBPATTERN:
+                out.append(self._emit(av[-1]))
+            elif op is sre_parse.BRANCH:
+                out.append(self._emit(rng.choice(av[1])))
+            elif op is sre_parse.CATEGORY:
+                out.append(self._emit_category(av))
+        return "".join(out)
+
+    def _emit_set(self, items):
+        choices = []
+        for op, av in items:
+            if op is sre_parse.NEGATE:
+                return rng_choice_excluding(self.rng, items)
+            if op is sre_parse.LITERAL:
+                choices.append(chr(av))
+            elif op is sre_parse.RANGE:
+                choices.append(chr(self.rng.randint(*av)))
+            elif op is sre_parse.CATEGORY:
+                choices.append(self._emit_category(av))
+        return self.rng.choice(choices) if choices else ""
+
+    def _emit_category(self, category):
+        if category is sre_parse.CATEGORY_DIGIT:
+            return self.rng.choice(string.digits)
+        if category is sre_parse.CATEGORY_SPACE:
+            return " "
+        if category is sre_parse.CATEGORY_WORD:
+            return self.rng.choice(WORD_CHARACTERS)
+        return self.rng.choice(string.ascii_letters)
+
+    def edge_cases(self, schema, depth=0):
+        schema = schema if isinstance(schema, dict) else {}
+        cached = self._edge_cases.get(id(schema))
+        if cached is None:
+            cached = self._edge_cases[id(schema)] = (schema, self._build_edge_cases(schema, depth))
+        return cached[1]
+
+    def _build_edge_cases(self, schema, depth):
+        schema_type = schema.get("type", "object" if "properties" in schema else "string")
+        cases = [("null", None)]
+        if schema.get("enum"):
+            cases.append(("value outside enum", "__not_in_enum__"))
+        if schema_type == "string":
+            cases += [("empty string", ""), ("wrong type", 12345), ("unicode", "é中\U0001f600")]
+            if "maxLength" in schema:
+                cases.append(("too long", "x" * (schema["maxLength"] + 1)))
+            if schema.get("minLength", 0) > 0:
+                cases.append(("too short", "x" * (schema["minLength"] - 1)))
+        elif schema_type in ("integer", "number"):
+            cases += [("zero", 0), ("negative", -1), ("huge", 2 ** 63), ("wrong type", "not-a-number")]
+            if "minimum" in schema:
+                cases += [("at minimum", schema["minimum"]), ("below minimum", schema["minimum"] - 1)]
+            if "maximum" in schema:
+                cases += [("at maximum", schema["maximum"]), ("above maximum", schema["maximum"] + 1)]
+        elif schema_type == "boolean":
+            cases.append(("wrong type", "true"))
+        elif schema_type == "array":
+            cases += [("empty array", []), ("wrong type", {})]
+            if "maxItems" in schema:
+                cases.append(("too many items", [self.valid(schema.get("items", {}))] * (schema["maxItems"] + 1)))
+        elif schema_type == "object":
+            valid = self.valid(schema)
+            cases += [("empty object", {}), ("wrong type", [])]
+            for name in schema.get("required", []):
+                cases.append((f"missing required '{name}'", {k: v for k, v in valid.items() if k != name}))
+            for name, prop in schema.get("properties", {}).items() if depth < MAX_DEPTH else ():
+                for description, value in self.edge_cases(prop, depth + 1)[:3]:
+                    cases.append((f"'{name}': {description}", {**valid, name: value}))
+        return cases
+
+    def cases(self, endpoint, edge_ratio=0.3):
+        body_schema = json_body_schema(endpoint)
+        while True:
+            path_params = {p["name"]: self.valid(p.get("schema", {})) for p in endpoint.path_params}
+            query_params = {
+                p["name"]: self.valid(p.get("schema", {}))
+                for p in endpoint.query_params
+                if p.get("required") or self.rng.random() < 0.5
+            }
+            body = self.valid(body_schema) if body_schema is not None else None
+            if self.rng.random() >= edge_ratio:
+                yield FuzzCase("valid", "valid input", path_params, query_params, body)
+                continue
+
+            targets = [("query", p) for p in endpoint.query_params]
+            if body_schema is not None:
+                targets.append(("body", {"schema": body_schema}))
+            if not targets:
+                yield FuzzCase("valid", "valid input", path_params, query_params, body)
+                continue
+            location, param = self.rng.choice(targets)
+            description, value = self.rng.choice(self.edge_cases(param.get("schema", {})))
+            if location == "query":
+                query_params = {**query_params, param["name"]: value}
+                description = f"query '{param['name']}': {description}"
+            else:
+                body = value
+                description = f"body: {description}"
+            yield FuzzCase("edge", description, path_params, query_params, body)
+
+
+def rng_choice_excluding(rng, items):
+    excluded = {chr(av) for op, av in items if op is sre_parse.LITERAL}
+    return rng.choice([c for c in string.ascii_letters + string.digits if c not in excluded] or ["~"])
+
+
+def json_body_schema(endpoint):
+    content = endpoint.request_body.get("content", {}) if endpoint.request_body else {}
+    media = content.get("application/json") or next((v for k, v in content.items() if "json" in k), None)
+    return media.get("schema", {}) if media is not None else None
+
+
+def check_response(endpoint, case, status_code, payload):
+    if status_code >= 500:
+        reason = "server error on valid input" if case.kind == "valid" else "server error on invalid input"
+        return reason, None
+    if endpoint.responses:
+        schema, declared = response_schema(endpoint.responses, status_code)
+        if not declared:
+            return "undeclared status code", None
+        if schema and payload is not None:
+            errors = validate(schema, payload)
+            if errors:
+                path, message = errors[0]
+                return f"response schema mismatch at {ARRAY_INDEX.sub('[*]', path)}", message
+    return None, None
+
+
+class FuzzCampaign:
+    def __init__(self, session, endpoint_index, base_url, partition_id="", concurrency=DEFAULT_CONCURRENCY,
+                 seed=None, edge_ratio=0.3, timeout=30, methods=None, gate=None):
+        self.session = session
+        self.gate = gate
+        self.endpoint_index = endpoint_index
+        self.base_url = base_url
+        self.partition_id = partition_id
+        self.concurrency = concurrency
+        self.generator = CaseGenerator(seed)
+        self.edge_ratio = edge_ratio
+        self.timeout = timeout
+        self.methods = {m.upper() for m in methods} if methods else None
+        self.failures = {}
+        self.executed = 0
+        self._lock = threading.Lock()
+
+    def iter_cases(self, cases_per_endpoint):
+        for endpoint in self.endpoint_index:
+            if self.methods and endpoint.method not in self.methods:
+                continue
+            generated = self.generator.cases(endpoint, self.edge_ratio)
+            for _ in range(cases_per_endpoint):
+                yield endpoint, next(generated)
+
+    def execute(self, endpoint, case):
+        url = urljoin(self.base_url, endpoint.url_builder.build(case.path_params, case.query_params))
+        has_body = endpoint.method in BODY_METHODS and case.body is not None
+        headers = build_headers({"Content-Type": "application/json"} if has_body else {}, self.partition_id)
+        try:
+            response = send_request(self.session, endpoint.method, url, headers, case.body, timeout=self.timeout,
+                                    gate=self.gate)
+            status_code = response.status_code
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            reason, detail = check_response(endpoint, case, status_code, payload)
+        except Exception as e:
+            status_code, reason, detail = None, type(e).__name__, str(e)
+
+        with self._lock:
+            self.executed += 1
+            if reason is None:
+                return
+            key = (endpoint.key, status_code, reason)
+            failure = self.failures.get(key)
+            if failure is None:
+                failure = self.failures[key] = Failure(endpoint.key, status_code, reason, example={
+                    "kind": case.kind,
+                    "description": case.description,
+                    "detail": detail,
+                    "url": url,
+                    "body": case.body,
+                })
+            failure.count += 1
+
+    def run(self, cases_per_endpoint):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = set()
+            for endpoint, case in self.iter_cases(cases_per_endpoint):
+                if len(pending) >= self.concurrency * 2:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                pending.add(pool.submit(self.execute, endpoint, case))
+            wait(pending)
+        return sorted(self.failures.values(), key=lambda f: (-f.count, f.endpoint))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fuzz every endpoint of a service from its OpenAPI schemas.")
+    parser.add_argument("service", help="Service name from the service registry")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--cases", type=int, default=100, help="Cases per endpoint")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--edge-ratio", type=float, default=0.3, help="Share of cases that use edge-case values")
+    parser.add_argument("--methods", nargs="*", help="Only fuzz these HTTP methods")
+    parser.add_argument("--partition-id", default="")
+    parser.add_argument("--token", default="")
+    parser.add_argument("--auth-method", choices=["header", "cookie"], default="header")
+    parser.add_argument("-o", "--output", help="Write deduplicated failures to this JSONL file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = load_service_registry()[args.service]
+    campaign = FuzzCampaign(
+        get_session(args.base_url, ConnectionSettings(pool_size=args.concurrency), AuthSettings(args.auth_method, args.token),
+                    gated=service.policy.enabled),
+        download_endpoint_index(service, args.base_url),
+        args.base_url,
+        partition_id=args.partition_id,
+        concurrency=args.concurrency,
+        seed=args.seed,
+        edge_ratio=args.edge_ratio,
+        methods=args.methods,
+        gate=policy_gate(service.name, service.policy, args.base_url),
+    )
+
+    started = time.perf_counter()
+    failures = campaign.run(args.cases)
+    elapsed = time.perf_counter() - started
+    print(f"{campaign.executed} cases in {elapsed:.1f} s ({campaign.executed / elapsed:.0f}/s), "
+          f"{len(failures)} distinct failures")
+    for failure in failures:
+        print(f"{failure.count:8} {failure.endpoint:40} {failure.status_code or '-':>5} {failure.reason}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for failure in failures:
+                f.write(json.dumps(failure.__dict__, default=str) + "\n")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
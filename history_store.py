@@ -0,0 +1,288 @@
+import difflib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+HISTORY_DB_PATH = os.environ.get(
+    "API_TESTER_HISTORY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.db")
+)
+INLINE_BODY_LIMIT = 4 * 1024
+MAX_STORED_BODY = 16 * 1024 * 1024
+MAX_AGE_SECONDS = 30 * 24 * 3600
+MAX_STORED_BYTES = 512 * 1024 * 1024
+PRUNE_EVERY = 500
+DIFF_BODY_LIMIT = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    owner TEXT NOT NULL DEFAULT '',
+    service TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER,
+    latency_ms REAL,
+    request_headers TEXT,
+    request_body TEXT,
+    response_headers TEXT,
+    response_size INTEGER NOT NULL DEFAULT 0,
+    stored_bytes INTEGER NOT NULL DEFAULT 0,
+    body_inline BLOB,
+    body_captured INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS bodies (
+    entry_id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_owner ON entries (owner, created_at);
+CREATE INDEX IF NOT EXISTS entries_service_endpoint ON entries (service, endpoint, created_at);
+CREATE INDEX IF NOT EXISTS entries_status ON entries (status, created_at);
+CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at);
+CREATE INDEX IF NOT EXISTS entries_latency ON entries (latency_ms);
+"""
+
+SUMMARY_COLUMNS = ("id", "created_at", "service", "endpoint", "method", "url", "status", "latency_ms", "response_size")
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB_PATH, max_age_s=MAX_AGE_SECONDS, max_bytes=MAX_STORED_BYTES):
+        self.path = path
+        self.max_age_s = max_age_s
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+        if columns and "owner" not in columns:
+            # Entries written before history had owners stay hidden from every user.
+            self._conn.execute("ALTER TABLE entries ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+        self._conn.executescript(SCHEMA)
+
+    def record(self, request, response, owner=""):
+        size = response.body.size
+        body = response.body.read_all() if size <= MAX_STORED_BODY else None
+        inline = body if body is not None and size <= INLINE_BODY_LIMIT else None
+        out_of_line = zlib.compress(body, 6) if body is not None and inline is None else None
+        stored_bytes = len(inline or out_of_line or b"")
+
+        timing = response.timing
+        row = (
+            time.time(),
+            owner,
+            request.service,
+            request.endpoint_key,
+            request.method,
+            request.url,
+            response.status_code,
+            timing.total_ms if timing is not None else response.elapsed_s * 1000,
+            json.dumps(dict(request.headers or {})),
+            json.dumps(request.json_data) if request.json_data is not None else None,
+            json.dumps(dict(response.headers)),
+            size,
+            stored_bytes,
+            inline,
+            int(body is not None),
+        )
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO entries (created_at, owner, service, endpoint, method, url, status, latency_ms, "
+                    "request_headers, request_body, response_headers, response_size, stored_bytes, body_inline, "
+                    "body_captured) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                entry_id = cursor.lastrowid
+                if out_of_line is not None:
+                    self._conn.execute("INSERT INTO bodies (entry_id, data) VALUES (?, ?)", (entry_id, out_of_line))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._inserts += 1
+            if self._inserts % PRUNE_EVERY == 0:
+                self._prune()
+        return entry_id
+
+    def search(self, service=None, endpoint=None, status=None, since=None, until=None,
+               min_latency_ms=None, order_by="created_at", limit=200, owner=None):
+        clauses, params = [], []
+        if owner is not None:
+            clauses.append("owner = ?")
+            params.append(owner)
+        if service:
+            clauses.append("service = ?")
+            params.append(service)
+        if endpoint:
+            clauses.append("endpoint = ?")
+            params.append(endpoint)
+        if isinstance(status, str) and status.endswith("xx"):
+            clauses.append("status BETWEEN ? AND ?")
+            params.extend((int(status[0]) * 100, int(status[0]) * 100 + 99))
+        elif status:
+            clauses.append("status = ?")
+            params.append(int(status))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if min_latency_ms is not None:
+            clauses.append("latency_ms >= ?")
+            params.append(min_latency_ms)
+        if order_by not in ("created_at", "latency_ms"):
+            raise ValueError(f"Cannot order history by {order_by}")
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM entries {where} ORDER BY {order_by} DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (*params, limit)).fetchall()
+        return [dict(zip(SUMMARY_COLUMNS, row)) for row in rows]
+
+    def get(self, entry_id, owner=None):
+        query = "SELECT e.*, b.data FROM entries e LEFT JOIN bodies b ON b.entry_id = e.id WHERE e.id = ?"
+        params = (entry_id,)
+        if owner is not None:
+            query += " AND e.owner = ?"
+            params += (owner,)
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            columns = [c[0] for c in self._conn.execute("SELECT * FROM entries LIMIT 0").description]
+        if row is None:
+            return None
+
+        entry = dict(zip(columns + ["body_data"], row))
+        compressed = entry.pop("body_data")
+        inline = entry.pop("body_inline")
+        entry["body"] = zlib.decompress(compressed) if compressed is not None else inline
+        for key in ("request_headers", "request_body", "response_headers"):
+            if entry[key] is not None:
+                entry[key] = json.loads(entry[key])
+        return entry
+
+    def distinct(self, column, owner=None):
+        if column not in ("service", "endpoint"):
+            raise ValueError(f"Cannot list distinct values of {column}")
+        where, params = ("WHERE owner = ?", (owner,)) if owner is not None else ("", ())
+        with self._lock:
+            return [row[0] for row in self._conn.execute(f"SELECT DISTINCT {column} FROM entries {where} ORDER BY 1",
+                                                         params)]
+
+    def stats(self, owner=None):
+        where, params = ("WHERE owner = ?", (owner,)) if owner is not None else ("", ())
+        with self._lock:
+            count, stored, oldest = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(stored_bytes), 0), MIN(created_at) FROM entries {where}", params
+            ).fetchone()
+        return {"entries": count, "stored_bytes": stored, "oldest": oldest}
+
+    def prune(self):
+        with self._lock:
+            return self._prune()
+
+    def _prune(self):
+        cutoff = 0
+        if self.max_age_s is not None:
+            row = self._conn.execute(
+                "SELECT MAX(id) FROM entries WHERE created_at < ?", (time.time() - self.max_age_s,)
+            ).fetchone()
+            cutoff = max(cutoff, row[0] or 0)
+        if self.max_bytes is not None:
+            row = self._conn.execute(
+                "SELECT MAX(id) FROM (SELECT id, SUM(stored_bytes) OVER (ORDER BY id DESC) AS total FROM entries) "
+                "WHERE total > ?",
+                (self.max_bytes,),
+            ).fetchone()
+            cutoff = max(cutoff, row[0] or 0)
+        if not cutoff:
+            return 0
+
+        self._conn.execute("BEGIN")
+        deleted = self._conn.execute("DELETE FROM entries WHERE id <= ?", (cutoff,)).rowcount
+        self._conn.execute("DELETE FROM bodies WHERE entry_id <= ?", (cutoff,))
+        self._conn.execute("COMMIT")
+        return deleted
+
+    def clear(self, owner=None):
+        with self._lock:
+            if owner is None:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.execute("DELETE FROM bodies")
+                self._conn.execute("VACUUM")
+                return
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM bodies WHERE entry_id IN (SELECT id FROM entries WHERE owner = ?)", (owner,))
+            self._conn.execute("DELETE FROM entries WHERE owner = ?", (owner,))
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class OwnerHistory:
+    # One user's view of the shared store: everything it records, lists or
+    # clears is limited to that owner's entries.
+    def __init__(self, store, owner):
+        self.store = store
+        self.owner = owner
+
+    def record(self, request, response):
+        return self.store.record(request, response, owner=self.owner)
+
+    def search(self, **filters):
+        return self.store.search(owner=self.owner, **filters)
+
+    def get(self, entry_id):
+        return self.store.get(entry_id, owner=self.owner)
+
+    def distinct(self, column):
+        return self.store.distinct(column, owner=self.owner)
+
+    def stats(self):
+        return self.store.stats(owner=self.owner)
+
+    def prune(self):
+        # Age and size limits apply to the whole file, whoever the entries belong to.
+        return self.store.prune()
+
+    def clear(self):
+        self.store.clear(owner=self.owner)
+
+
+def body_text(entry):
+    body = entry.get("body")
+    if body is None:
+        return None
+    if len(body) > DIFF_BODY_LIMIT:
+        return f"<{len(body)} bytes, too large to compare>"
+    text = body.decode("utf-8", errors="replace")
+    try:
+        return json.dumps(json.loads(text), indent=2, sort_keys=True)
+    except ValueError:
+        return text
+
+
+def diff_entries(left, right):
+    lines = []
+    if left["status"] != right["status"]:
+        lines.append(f"status: {left['status']} -> {right['status']}")
+    for name in sorted(set(left["response_headers"] or {}) | set(right["response_headers"] or {})):
+        before, after = (left["response_headers"] or {}).get(name), (right["response_headers"] or {}).get(name)
+        if before != after:
+            lines.append(f"header {name}: {before} -> {after}")
+
+    left_body, right_body = body_text(left) or "", body_text(right) or ""
+    body_diff = difflib.unified_diff(
+        left_body.splitlines(), right_body.splitlines(),
+        fromfile=f"#{left['id']}", tofile=f"#{right['id']}", lineterm="",
+    )
+    return "\n".join(lines + list(body_diff))
@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.cookiejar import CookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.util.retry import Retry
+
+from instrumentation import InstrumentedHTTPAdapter, current_timing
+
+SUPPORTED_METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH")
+BODY_METHODS = ("POST", "PUT", "PATCH")
+MAX_SESSIONS = 64
+
+
+@dataclass(frozen=True)
+class ConnectionSettings:
+    pool_size: int = 10
+    max_retries: int = 2
+    backoff_factor: float = 0.3
+    retry_statuses: tuple = (502, 503, 504)
+
+
+@dataclass(frozen=True)
+class AuthSettings:
+    method: str = "header"
+    token: str = ""
+    header_name: str = "Authorization"
+    header_prefix: str = "Bearer "
+    cookie_name: str = "stoken"
+
+
+DEFAULT_CONNECTION_SETTINGS = ConnectionSettings()
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+class NoCookiesPolicy(CookiePolicy):
+    # Sessions are pooled across every user of the app, so cookies set by a
+    # server must not be stored and replayed on someone else's requests.
+    netscape = True
+    rfc2965 = False
+    hide_cookie2 = False
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+    def domain_return_ok(self, domain, request):
+        return False
+
+    def path_return_ok(self, path, request):
+        return False
+
+
+def origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def create_session(settings, auth=None, gated=False):
+    session = requests.Session()
+    session.cookies.set_policy(NoCookiesPolicy())
+    if gated:
+        # Requests that go through a service policy are retried there only,
+        # where every attempt is counted, rate-limited and seen by the breaker.
+        retry = Retry(total=0, raise_on_status=False)
+    else:
+        retry = Retry(
+            total=settings.max_retries,
+            backoff_factor=settings.backoff_factor,
+            status_forcelist=settings.retry_statuses,
+            raise_on_status=False,
+        )
+    adapter = InstrumentedHTTPAdapter(pool_connections=1, pool_maxsize=settings.pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    if auth is not None and auth.token:
+        if auth.method == "header":
+            session.headers[auth.header_name] = f"{auth.header_prefix}{auth.token}"
+        else:
+            session.headers["Cookie"] = f"{auth.cookie_name}={auth.token}"
+    return session
+
+
+def get_session(base_url, settings=DEFAULT_CONNECTION_SETTINGS, auth=None, gated=False):
+    key = (origin(base_url), settings, auth, gated)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = create_session(settings, auth, gated)
+            _sessions[key] = session
+        _sessions.move_to_end(key)
+        while len(_sessions) > MAX_SESSIONS:
+            _, evicted = _sessions.popitem(last=False)
+            evicted.close()
+        return session
+
+
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def send_request(session, method, url, headers, json_data, timeout=30, stream=False, gate=None, cancel_event=None):
+    if method not in SUPPORTED_METHODS:
+        raise ValueError(f"Unsupported HTTP method: {method}")
+    body = json_data if method in BODY_METHODS else None
+    if gate is None:
+        return session.request(method, url, headers=headers, json=body, timeout=timeout, stream=stream)
+
+    def attempt():
+        # Latency covers the attempt that produced the response, not the time
+        # the policy spent queueing or backing off before it.
+        timing = current_timing()
+        if timing is not None:
+            timing.restart()
+        return session.request(method, url, headers=headers, json=body, timeout=timeout, stream=stream)
+
+    return gate.send(method, attempt, cancel_event)
@@ -0,0 +1,236 @@
+import json
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PHASES = ("dns", "connect", "tls", "ttfb", "download")
+MAX_RECENT_RECORDS = 10_000
+
+_local = threading.local()
+
+
+@dataclass
+class RequestTiming:
+    started: float = field(default_factory=time.perf_counter)
+    dns_ms: float = 0.0
+    connect_ms: float = 0.0
+    tls_ms: float = 0.0
+    ttfb_ms: float = 0.0
+    download_ms: float = 0.0
+    total_ms: float = 0.0
+    # Time spent before the final attempt: policy queueing, earlier attempts and backoff.
+    wait_ms: float = 0.0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    connection_reused: bool = True
+    _request_sent: float = 0.0
+    _headers_received: float = 0.0
+
+    def phases(self):
+        return {phase: getattr(self, f"{phase}_ms") for phase in PHASES}
+
+    def restart(self):
+        now = time.perf_counter()
+        wait_ms = self.wait_ms + (now - self.started) * 1000
+        self.__init__(started=now, wait_ms=wait_ms)
+
+    def finish(self, response_bytes):
+        now = time.perf_counter()
+        self.response_bytes += response_bytes
+        if self._headers_received:
+            self.download_ms = (now - self._headers_received) * 1000
+        self.total_ms = (now - self.started) * 1000
+
+
+def current_timing():
+    return getattr(_local, "timing", None)
+
+
+@contextmanager
+def track_request():
+    timing = RequestTiming()
+    _local.timing = timing
+    try:
+        yield timing
+    finally:
+        _local.timing = None
+
+
+class _TimingMixin:
+    def _new_conn(self):
+        timing = current_timing()
+        if timing is None:
+            return super()._new_conn()
+
+        dns_host = self._dns_host
+        started = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror:
+            # Let urllib3 resolve again and raise its usual NameResolutionError.
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timing.dns_ms = (resolved - started) * 1000
+
+        # Resolved once for timing, then every address is tried in order, as
+        # urllib3 would do itself (IPv6 then IPv4, several A records).
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (NewConnectionError, ConnectTimeoutError):
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = dns_host
+        timing.connect_ms = (time.perf_counter() - resolved) * 1000
+        return sock
+
+    def connect(self):
+        timing = current_timing()
+        started = time.perf_counter()
+        super().connect()
+        if timing is not None:
+            timing.connection_reused = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            timing.tls_ms = max(elapsed_ms - timing.dns_ms - timing.connect_ms, 0.0) if self.scheme == "https" else 0.0
+
+    def request(self, method, url, body=None, headers=None, **kwargs):
+        super().request(method, url, body=body, headers=headers, **kwargs)
+        timing = current_timing()
+        if timing is not None:
+            timing._request_sent = time.perf_counter()
+            header_bytes = sum(len(k) + len(v) + 4 for k, v in (headers or {}).items())
+            body_bytes = len(body) if isinstance(body, (bytes, str)) else 0
+            timing.request_bytes = len(method) + len(url) + 12 + header_bytes + body_bytes
+
+    def getresponse(self):
+        response = super().getresponse()
+        timing = current_timing()
+        if timing is not None:
+            timing._headers_received = time.perf_counter()
+            timing.ttfb_ms = (timing._headers_received - (timing._request_sent or timing.started)) * 1000
+            timing.response_bytes = sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        return response
+
+
+class TimedHTTPConnection(_TimingMixin, HTTPConnection):
+    scheme = "http"
+
+
+class TimedHTTPSConnection(_TimingMixin, HTTPSConnection):
+    scheme = "https"
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+class MetricsStore:
+    def __init__(self, max_records=MAX_RECENT_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, service, endpoint, method, status, timing):
+        labels = (service, endpoint, method, str(status))
+        total_s = timing.total_ms / 1000
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {
+                    "count": 0,
+                    "sum": 0.0,
+                    "buckets": [0] * len(LATENCY_BUCKETS_S),
+                    "phases": dict.fromkeys(PHASES, 0.0),
+                    "request_bytes": 0,
+                    "response_bytes": 0,
+                    "reused": 0,
+                }
+            series["count"] += 1
+            series["sum"] += total_s
+            for i, bound in enumerate(LATENCY_BUCKETS_S):
+                if total_s <= bound:
+                    series["buckets"][i] += 1
+            for phase, value in timing.phases().items():
+                series["phases"][phase] += value / 1000
+            series["request_bytes"] += timing.request_bytes
+            series["response_bytes"] += timing.response_bytes
+            series["reused"] += int(timing.connection_reused)
+
+            record = {k: v for k, v in asdict(timing).items() if not k.startswith("_") and k != "started"}
+            record.update(time=time.time(), service=service, endpoint=endpoint, method=method, status=status)
+            self.records.append(record)
+
+    def to_jsonl(self):
+        with self._lock:
+            return "".join(json.dumps(record) + "\n" for record in self.records)
+
+    def to_prometheus(self):
+        lines = [
+            "# HELP api_tester_request_duration_seconds Total request duration.",
+            "# TYPE api_tester_request_duration_seconds histogram",
+        ]
+        phase_lines = [
+            "# HELP api_tester_request_phase_seconds_total Time spent per request phase.",
+            "# TYPE api_tester_request_phase_seconds_total counter",
+        ]
+        byte_lines = [
+            "# HELP api_tester_request_bytes_total Bytes sent and received.",
+            "# TYPE api_tester_request_bytes_total counter",
+        ]
+        reuse_lines = [
+            "# HELP api_tester_connections_reused_total Requests served over a kept-alive connection.",
+            "# TYPE api_tester_connections_reused_total counter",
+        ]
+        with self._lock:
+            for (service, endpoint, method, status), series in sorted(self._series.items()):
+                labels = (
+                    f'service="{_escape(service)}",endpoint="{_escape(endpoint)}",'
+                    f'method="{method}",status="{status}"'
+                )
+                for bound, count in zip(LATENCY_BUCKETS_S, series["buckets"]):
+                    lines.append(f'api_tester_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'api_tester_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f"api_tester_request_duration_seconds_sum{{{labels}}} {series['sum']}")
+                lines.append(f"api_tester_request_duration_seconds_count{{{labels}}} {series['count']}")
+                for phase, value in series["phases"].items():
+                    phase_lines.append(f'api_tester_request_phase_seconds_total{{{labels},phase="{phase}"}} {value}')
+                byte_lines.append(
+                    f'api_tester_request_bytes_total{{{labels},direction="sent"}} {series["request_bytes"]}'
+                )
+                byte_lines.append(
+                    f'api_tester_request_bytes_total{{{labels},direction="received"}} {series["response_bytes"]}'
+                )
+                reuse_lines.append(f"api_tester_connections_reused_total{{{labels}}} {series['reused']}")
+        return "\n".join(lines + phase_lines + byte_lines + reuse_lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
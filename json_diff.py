@@ -0,0 +1,96 @@
+import json
+from dataclasses import dataclass
+
+from schema_validation import format_path
+
+MAX_CHANGES = 500
+IDENTITY_KEYS = ("id", "uuid", "key", "name")
+
+
+@dataclass(frozen=True, slots=True)
+class JsonChange:
+    path: str
+    kind: str
+    left: object = None
+    right: object = None
+
+
+def _same(a, b):
+    # == treats True as 1 and 1 as 1.0, but JSON does not, so values that compare
+    # equal are confirmed on their canonical text. Unequal values skip the dump.
+    if a != b:
+        return False
+    if type(a) is type(b) and isinstance(a, str):
+        return True
+    return json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+
+
+def _identity_key(left, right):
+    # Arrays of objects that share a unique id-like field are matched on it, so
+    # one inserted item shows up as an addition instead of a shifted tail.
+    if not left or not right or not all(isinstance(item, dict) for item in left) \
+            or not all(isinstance(item, dict) for item in right):
+        return None
+    for key in IDENTITY_KEYS:
+        try:
+            left_ids = [item[key] for item in left]
+            right_ids = [item[key] for item in right]
+            if len(set(left_ids)) == len(left_ids) and len(set(right_ids)) == len(right_ids):
+                return key
+        except (KeyError, TypeError):
+            continue
+    return None
+
+
+def _diff_lists(path, left, right, pending, changes):
+    key = _identity_key(left, right)
+    if key is None:
+        common = min(len(left), len(right))
+        for i in range(common - 1, -1, -1):
+            if not _same(left[i], right[i]):
+                pending.append(((path, i), left[i], right[i]))
+        changes.extend(JsonChange(format_path((path, i)), "removed", left=left[i]) for i in range(common, len(left)))
+        changes.extend(JsonChange(format_path((path, i)), "added", right=right[i]) for i in range(common, len(right)))
+        return
+
+    right_positions = {item[key]: i for i, item in enumerate(right)}
+    left_ids = set()
+    for i in range(len(left) - 1, -1, -1):
+        item = left[i]
+        left_ids.add(item[key])
+        j = right_positions.get(item[key])
+        if j is None:
+            changes.append(JsonChange(format_path((path, i)), "removed", left=item))
+        elif not _same(item, right[j]):
+            pending.append(((path, i), item, right[j]))
+    changes.extend(
+        JsonChange(format_path((path, j)), "added", right=item) for j, item in enumerate(right) if item[key] not in left_ids
+    )
+
+
+def diff_json(left, right, max_changes=MAX_CHANGES):
+    # Only subtrees that differ are walked; == and json.dumps run in C, so
+    # identical parts of large bodies cost one comparison and one dump.
+    changes = []
+    if _same(left, right):
+        return changes, False
+
+    pending = [(None, left, right)]
+    while pending:
+        if len(changes) >= max_changes:
+            return changes[:max_changes], True
+        path, a, b = pending.pop()
+        if isinstance(a, dict) and isinstance(b, dict):
+            for key in reversed(list(a)):
+                if key not in b:
+                    changes.append(JsonChange(format_path((path, key)), "removed", left=a[key]))
+                elif not _same(a[key], b[key]):
+                    pending.append(((path, key), a[key], b[key]))
+            changes.extend(JsonChange(format_path((path, key)), "added", right=b[key]) for key in b if key not in a)
+        elif isinstance(a, list) and isinstance(b, list):
+            _diff_lists(path, a, b, pending, changes)
+        else:
+            same_kind = type(a) is type(b) or (isinstance(a, (int, float)) and isinstance(b, (int, float))
+                                               and not isinstance(a, bool) and not isinstance(b, bool))
+            changes.append(JsonChange(format_path(path), "changed" if same_kind else "type", a, b))
+    return changes[:max_changes], len(changes) > max_changes
@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from http_client import send_request
+from instrumentation import track_request
+
+SUB_BUCKET_BITS = 7
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in microseconds, in the spirit of HdrHistogram.
+
+    Each power-of-two range is split into 2**SUB_BUCKET_BITS linear buckets, which
+    keeps the relative error of reported percentiles below 1% with a bounded
+    number of buckets regardless of how many samples are recorded.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self._sum = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(value):
+        # Keeps SUB_BUCKET_BITS + 1 significant bits, so every bucket index below
+        # the top bit ranges over 2**SUB_BUCKET_BITS values.
+        shift = max(value.bit_length() - SUB_BUCKET_BITS - 1, 0)
+        return shift, value >> shift
+
+    @staticmethod
+    def _bucket_value(bucket):
+        shift, sub = bucket
+        return ((sub + 1) << shift) - 1
+
+    def record(self, seconds):
+        value = max(int(seconds * 1_000_000), 0)
+        with self._lock:
+            self.counts[self._bucket(value)] += 1
+            self.total += 1
+            self._sum += value
+            self.max = max(self.max, value)
+            self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, percent):
+        with self._lock:
+            if not self.total:
+                return 0.0
+            threshold = max(1, round(self.total * percent / 100))
+            seen = 0
+            for bucket in sorted(self.counts):
+                seen += self.counts[bucket]
+                if seen >= threshold:
+                    return min(self._bucket_value(bucket), self.max) / 1000
+            return self.max / 1000
+
+    def mean(self):
+        with self._lock:
+            return self._sum / self.total / 1000 if self.total else 0.0
+
+
+@dataclass
+class LoadTestConfig:
+    method: str
+    url: str
+    headers: dict
+    json_data: object = None
+    concurrency: int = 10
+    target_rps: float = 0
+    duration_s: float = 10
+    max_requests: int = 0
+    timeout: float = 30
+    gate: object = None
+
+
+class LoadTest:
+    def __init__(self, session, config):
+        self.session = session
+        self.config = config
+        self.histogram = LatencyHistogram()
+        self.wait_histogram = LatencyHistogram()
+        self.status_counts = Counter()
+        self.error_counts = Counter()
+        self.started_at = None
+        self.finished_at = None
+        self._issued = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="load-test", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _claim(self):
+        config = self.config
+        if self._expired():
+            return False
+        with self._lock:
+            if config.max_requests and self._issued >= config.max_requests:
+                return False
+            self._issued += 1
+            return True
+
+    def _expired(self):
+        return self._stop.is_set() or time.perf_counter() - self.started_at >= self.config.duration_s
+
+    def _acquire(self, slot):
+        while not slot.acquire(timeout=0.1):
+            if self._expired():
+                return False
+        return True
+
+    def _fire(self, drop_if_expired=False, scheduled_at=None):
+        if drop_if_expired and self._expired():
+            return
+        config = self.config
+        # In target-RPS mode latency counts from the intended send time, so a
+        # request held back behind a slow service is not reported as fast.
+        lag = max(time.perf_counter() - scheduled_at, 0.0) if scheduled_at is not None else 0.0
+        try:
+            with track_request() as timing:
+                response = send_request(
+                    self.session, config.method, config.url, config.headers, config.json_data, timeout=config.timeout,
+                    gate=config.gate,
+                )
+                response.content
+            timing.finish(0)
+            self.histogram.record(lag + timing.total_ms / 1000)
+            if timing.wait_ms:
+                self.wait_histogram.record(timing.wait_ms / 1000)
+            with self._lock:
+                self.status_counts[response.status_code] += 1
+        except Exception as e:
+            with self._lock:
+                self.error_counts[type(e).__name__] += 1
+
+    def _closed_loop_worker(self):
+        while self._claim():
+            self._fire()
+
+    def _run(self):
+        config = self.config
+        with ThreadPoolExecutor(max_workers=config.concurrency) as pool:
+            if config.target_rps > 0:
+                interval = 1 / config.target_rps
+                next_at = time.perf_counter()
+                # Bounds the queued requests; when the service falls behind the
+                # schedule keeps running, and the late sends show up as latency.
+                outstanding = threading.Semaphore(config.concurrency * 2)
+                while self._claim() and self._acquire(outstanding):
+                    pool.submit(self._fire, True, next_at).add_done_callback(lambda _: outstanding.release())
+                    next_at += interval
+                    delay = next_at - time.perf_counter()
+                    if delay > 0:
+                        self._stop.wait(delay)
+            else:
+                for _ in range(config.concurrency):
+                    pool.submit(self._closed_loop_worker)
+        self.finished_at = time.perf_counter()
+
+    def snapshot(self):
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        with self._lock:
+            status_counts = dict(self.status_counts)
+            error_counts = dict(self.error_counts)
+        completed = sum(status_counts.values())
+        failed = sum(count for status, count in status_counts.items() if status >= 400)
+        failed += sum(error_counts.values())
+        attempted = completed + sum(error_counts.values())
+        return {
+            "elapsed_s": elapsed,
+            "requests": attempted,
+            "throughput_rps": completed / elapsed if elapsed else 0.0,
+            "p50_ms": self.histogram.percentile(50),
+            "p90_ms": self.histogram.percentile(90),
+            "p99_ms": self.histogram.percentile(99),
+            "max_ms": self.histogram.max / 1000,
+            "mean_ms": self.histogram.mean(),
+            "policy_wait_p99_ms": self.wait_histogram.percentile(99),
+            "error_rate": failed / attempted if attempted else 0.0,
+            "status_counts": status_counts,
+            "error_counts": error_counts,
+            "running": self.running,
+        }
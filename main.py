@@ -1,10 +1,42 @@
 import json
-import requests
+import secrets
+import time
+from dataclasses import asdict, replace
 from urllib.parse import urljoin
 import pandas as pd
 import streamlit as st
-
-from openapi_manager import load_openapi_spec, process_openapi_spec
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from codegen import generate as generate_code
+from comparison import Target, start_comparison
+from history_store import HistoryStore, OwnerHistory, body_text, diff_entries
+from http_client import AuthSettings, ConnectionSettings, get_session
+from instrumentation import MetricsStore
+from load_tester import LoadTest, LoadTestConfig
+from memory_usage import deep_sizeof, format_bytes
+from mock_server import MockSettings, create_mock_server
+from openapi_manager import (
+    get_endpoint_index,
+    get_index_tracker,
+    get_service_registry,
+    get_spec_cache,
+    get_spec_prefetcher,
+    load_openapi_spec,
+    prefetch_service_specs,
+)
+from request_builder import build_headers, prepare_request_body
+from request_executor import PreparedRequest, RequestExecutor
+from response_streaming import DOWNLOAD_LIMIT, JSON_RENDER_LIMIT, PAGE_BYTES, is_line_stream
+from search_index import SearchIndex, search_all
+from service_policy import ServicePolicy, gate_snapshots, policy_gate
+from workflows import WorkflowError, WorkflowRunner, list_collections, load_collection, save_collection
+
+SPEC_POLL_SECONDS = 30
+DEFAULT_REQUEST_HEADERS = (
+    {"key": "data-partition-id", "value": "trial", "enabled": True},
+    {"key": "", "value": "", "enabled": False},
+)
 
 def initialize_session_state():
     if 'base_url' not in st.session_state:
@@ -15,23 +47,19 @@ def initialize_session_state():
         st.session_state.auth_method = "header"
     if 'selected_endpoint' not in st.session_state:
         st.session_state.selected_endpoint = None
-    if 'response_data' not in st.session_state:
-        st.session_state.response_data = None
-    if 'response_status' not in st.session_state:
-        st.session_state.response_status = None
-    if 'response_headers' not in st.session_state:
-        st.session_state.response_headers = None
     if 'current_service' not in st.session_state:
-        st.session_state.current_service = "Service1"
+        st.session_state.current_service = next(iter(get_service_registry()))
     if 'custom_headers' not in st.session_state:
         st.session_state.custom_headers = [{"key": "", "value": "", "enabled": True}]
-    if 'openapi_specs' not in st.session_state:
-        st.session_state.openapi_specs = {}
+    if 'request_handles' not in st.session_state:
+        st.session_state.request_handles = {}
+    if 'export_cases' not in st.session_state:
+        st.session_state.export_cases = {}
+    if 'seen_spec_hashes' not in st.session_state:
+        st.session_state.seen_spec_hashes = {}
     if 'services' not in st.session_state:
         st.session_state.services = {
-            "Service1": "Service 1",
-            "Service2": "Service 2",
-            "Service3": "Service 3"
+            name: service.display_name for name, service in get_service_registry().items()
         }
     if 'base_url_options' not in st.session_state:
         st.session_state.base_url_options = [
@@ -84,6 +112,23 @@ def api_configuration_sidebar():
             st.session_state.base_url = selected_base_url
 
         st.write(f"Current Base URL: {st.session_state.base_url}")
+
+        st.subheader("OpenAPI Spec")
+        if st.button("Refresh spec"):
+            st.session_state.refresh_spec = True
+        with st.expander("Service spec status"):
+            prefetcher = get_spec_prefetcher()
+            for name, service in get_service_registry().items():
+                st.write(f"**{service.display_name}:** {prefetcher.status(service, st.session_state.base_url)}")
+        stats = get_spec_cache().stats()
+        st.caption(
+            f"Spec cache: {stats['hits']} hits, {stats['not_modified']} revalidated (304), "
+            f"{stats['misses']} misses, {stats['entries']} cached"
+        )
+        st.toggle("Watch for spec changes", value=True, key="watch_spec")
+        with st.expander("Spec changelog"):
+            display_spec_changelog()
+
         st.subheader("Authentication Settings")
         st.session_state.stoken = st.text_input("Auth Token", st.session_state.get("stoken", ""), type="password")
         st.session_state.auth_method = st.radio("Select Auth Method", ["header", "cookie"])
@@ -94,6 +139,75 @@ def api_configuration_sidebar():
         else:
             st.session_state.auth_cookie_name = st.text_input("Cookie Name", value="stoken")
 
+        with st.expander("Requests"):
+            display_request_handles()
+
+        with st.expander("Metrics"):
+            metrics_store = get_metrics_store()
+            st.download_button("Export Prometheus metrics", data=metrics_store.to_prometheus(),
+                               file_name="api_tester_metrics.prom", mime="text/plain")
+            st.download_button("Export request log (JSONL)", data=metrics_store.to_jsonl(),
+                               file_name="api_tester_requests.jsonl", mime="application/jsonl")
+
+        with st.expander("Connection Settings"):
+            st.session_state.connection_settings = ConnectionSettings(
+                pool_size=int(st.number_input("Connection pool size", min_value=1, max_value=100, value=10)),
+                max_retries=int(st.number_input("Max retries", min_value=0, max_value=10, value=2)),
+                backoff_factor=float(st.number_input("Retry backoff factor (s)", min_value=0.0, value=0.3, step=0.1)),
+            )
+
+
+
+def display_spec_changelog():
+    changelog = get_index_tracker().changelog((st.session_state.base_url, st.session_state.current_service))
+    if not changelog:
+        st.caption("No changes seen since the spec was first loaded.")
+        return
+
+    for change in reversed(changelog):
+        st.markdown(f"**{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(change.detected_at))}** - {change.summary()}")
+        lines = [f"+ {key}" for key in change.added] + [f"- {key}" for key in change.removed] + \
+                [f"~ {key}" for key in change.changed]
+        st.code("\n".join(lines), language="diff")
+
+
+def watch_spec(spec_hash):
+    service = get_service_registry()[st.session_state.current_service]
+    future = get_spec_prefetcher().fetch(service, st.session_state.base_url, max_age=SPEC_POLL_SECONDS)
+    if future.done() and future.exception() is None and future.result().spec_hash != spec_hash:
+        st.rerun()
+
+
+def current_endpoint_index(cached_spec):
+    tracker = get_index_tracker()
+    key = (st.session_state.base_url, st.session_state.current_service)
+    previous = tracker.latest(key)
+    if previous is not None and previous.spec_hash == cached_spec.spec_hash:
+        index = previous
+    else:
+        index = get_endpoint_index(cached_spec.spec_hash, cached_spec.spec, previous)
+        tracker.update(key, index)
+
+    seen = st.session_state.seen_spec_hashes
+    if seen.get(key) not in (None, index.spec_hash):
+        change = next((c for c in reversed(tracker.changelog(key)) if c.new_hash == index.spec_hash), None)
+        if change is not None:
+            st.toast(f"{st.session_state.current_service} spec updated: {change.summary()}")
+    seen[key] = index.spec_hash
+    return index
+
+
+def display_request_handles():
+    handles = st.session_state.request_handles
+    if not handles:
+        st.caption("No requests sent yet.")
+        return
+
+    for form_key, handle in list(handles.items()):
+        cols = st.columns([0.75, 0.25])
+        cols[0].write(f"`{handle.request.method} {handle.request.url}` - {handle.state}")
+        if not handle.done and cols[1].button("Cancel", key=f"sidebar_cancel_{handle.id}"):
+            handle.cancel()
 
 
 def data_partition_selection():
@@ -115,71 +229,56 @@ def display_headers_section(key_prefix=""):
     st.subheader("Headers")
     selected_data_partition_id = ""
     headers_key = f"custom_headers_{key_prefix}"
-    rerun_trigger_key = f"{key_prefix}_trigger_rerun"
 
-    if headers_key not in st.session_state:
-        st.session_state[headers_key] = [
-            {"key": "data-partition-id", "value": "trial", "enabled": True},
-            {"key": "", "value": "", "enabled": False}
-        ]
-
-    if rerun_trigger_key not in st.session_state:
-        st.session_state[rerun_trigger_key] = False
-
-    headers = st.session_state[headers_key]
+    # Every form shows the shared default rows until the user edits them; only
+    # edited header lists are kept in session state.
+    headers = st.session_state.get(headers_key, DEFAULT_REQUEST_HEADERS)
+    edited = [dict(header) for header in headers]
+    values = [header["value"] for header in headers]
     headers_to_remove = []
+    rerun = False
 
     for i, header in enumerate(headers):
         cols = st.columns([0.1, 0.35, 0.35, 0.1])
 
         with cols[0]:
-            st.session_state[headers_key][i]["enabled"] = st.checkbox(
-                "", value=header["enabled"], key=f"{key_prefix}_enabled_{i}"
-            )
+            edited[i]["enabled"] = st.checkbox("", value=header["enabled"], key=f"{key_prefix}_enabled_{i}")
         with cols[1]:
-            st.session_state[headers_key][i]["key"] = st.text_input(
+            edited[i]["key"] = st.text_input(
                 "Header Key", value=header["key"], key=f"{key_prefix}_key_{i}", placeholder="Content-Type"
             )
         with cols[2]:
-            if headers[i]["key"] == "data-partition-id":
+            if header["key"] == "data-partition-id":
                 partition_options = ["partition1", "partition2"]
                 selected = st.selectbox("Data Partition ID for this request", partition_options,
                                         index=0, key=f"partition_{key_prefix}")
                 custom = st.text_input("Or enter a custom partition ID", key=f"custom_partition_{key_prefix}")
-                headers[i]["value"] = custom or selected
-                selected_data_partition_id = headers[i]["value"]
+                values[i] = selected_data_partition_id = custom or selected
             else:
-                st.session_state[headers_key][i]["value"] = st.text_input(
+                values[i] = edited[i]["value"] = st.text_input(
                     "Header Value", value=header["value"], key=f"{key_prefix}_value_{i}", placeholder="application/json"
                 )
         with cols[3]:
             st.markdown("<br>", unsafe_allow_html=True)
             if st.button("Remove", key=f"{key_prefix}_remove_{i}"):
                 headers_to_remove.append(i)
-                st.session_state[rerun_trigger_key] = True
+                rerun = True
+
+    result = {edited[i]["key"]: values[i] for i in range(len(edited)) if edited[i]["enabled"] and edited[i]["key"]}
 
-    if headers_to_remove:
-        for i in sorted(headers_to_remove, reverse=True):
-            if i < len(headers):
-                headers.pop(i)
+    for i in sorted(headers_to_remove, reverse=True):
+        edited.pop(i)
 
     if st.button("Add Header", key=f"{key_prefix}_add"):
-        headers.append({"key": "", "value": "", "enabled": True})
-        st.session_state[rerun_trigger_key] = True
+        edited.append({"key": "", "value": "", "enabled": True})
+        rerun = True
 
-    if st.session_state[rerun_trigger_key]:
-        st.session_state[rerun_trigger_key] = False
+    if edited != list(headers):
+        st.session_state[headers_key] = edited
+    if rerun:
         st.rerun()
 
-    return {h["key"]: h["value"] for h in headers if h["enabled"] and h["key"]}, selected_data_partition_id
-
-def process_path_parameters(url_template, path_params_values):
-    processed_url = url_template
-    for param_name, param_value in path_params_values.items():
-        if param_value:
-            processed_url = processed_url.replace(f"{{{param_name}}}", str(param_value))
-    return processed_url
-
+    return result, selected_data_partition_id
 
 def display_request_form(endpoint, idx):
   form_key = f"endpoint_form_{idx}"
@@ -191,7 +290,19 @@ def display_request_form(endpoint, idx):
   custom_headers = {}
   request_partition_id = ""
 
-  tab_labels, tab_content = build_tabs(endpoint, form_key)
+  def prepare_request():
+    headers = build_headers(custom_headers, request_partition_id)
+    full_path = endpoint.url_builder.build(path_params_values, query_params_values)
+
+    json_data = None
+    if endpoint.method in ["POST", "PUT", "PATCH"]:
+      if json_input_type == "Raw JSON" and raw_json:
+        json_data = json.loads(raw_json)
+      else:
+        json_data = prepare_request_body(body_params, endpoint)
+    return full_path, headers, json_data
+
+  tab_labels, tab_content = build_tabs(endpoint, form_key, prepare_request)
 
   tabs = st.tabs(tab_labels)
   for label, tab in zip(tab_labels, tabs):
@@ -205,33 +316,39 @@ def display_request_form(endpoint, idx):
         body_params, raw_json, json_input_type = results
 
   if st.button("Execute Request", key=f"execute_btn_{form_key}"):
-    headers = build_headers(custom_headers, request_partition_id)
-
-    if st.session_state.get("stoken") and st.session_state.get("auth_method") == "header":
-      headers[st.session_state.auth_header_name] = (
-        f"{st.session_state.auth_header_prefix}{st.session_state.stoken}"
-      )
-
-    full_path = build_full_url(endpoint["path"], path_params_values, query_params_values)
-
-    json_data = None
-    if endpoint["method"] in ["POST", "PUT", "PATCH"]:
-      if json_input_type == "Raw JSON" and raw_json:
-        try:
-          json_data = json.loads(raw_json)
-        except json.JSONDecodeError:
-          st.error("Invalid JSON in request body")
-          return
-      else:
-        json_data = prepare_request_body(body_params, endpoint)
+    try:
+      full_path, headers, json_data = prepare_request()
+    except json.JSONDecodeError:
+      st.error("Invalid JSON in request body")
+      return
 
-    execute_request(endpoint, full_path, headers, json_data)
+    execute_request(endpoint, full_path, headers, json_data, form_key)
 
-def build_tabs(endpoint, form_key):
+  if st.button("Add to test suite", key=f"export_btn_{form_key}"):
+    try:
+      _, headers, json_data = prepare_request()
+    except json.JSONDecodeError:
+      st.error("Invalid JSON in request body")
+      return
+
+    st.session_state.export_cases.setdefault(st.session_state.current_service, []).append({
+      "endpoint": endpoint.key,
+      "path_params": dict(path_params_values),
+      "query_params": dict(query_params_values),
+      "headers": headers,
+      "body": json_data,
+    })
+    st.toast(f"Added {endpoint.key} to the {st.session_state.current_service} test suite")
+
+  handle = st.session_state.request_handles.get(form_key)
+  if handle is not None:
+    display_request_handle(handle, form_key)
+
+def build_tabs(endpoint, form_key, prepare_request):
     tab_labels = []
     tab_content = {}
 
-    if endpoint.get("path_params") or endpoint.get("query_params"):
+    if endpoint.path_params or endpoint.query_params:
       tab_labels.append("Params")
       tab_content["Params"] = lambda: (
         render_path_params(endpoint, form_key),
@@ -241,16 +358,180 @@ def build_tabs(endpoint, form_key):
     tab_labels.append("Headers")
     tab_content["Headers"] = lambda: render_headers_tab(form_key)
 
-    if endpoint.get("requestBody") or endpoint["method"] in ["POST", "PUT", "PATCH"]:
+    if endpoint.request_body or endpoint.method in ["POST", "PUT", "PATCH"]:
       tab_labels.append("Body")
       tab_content["Body"] = lambda: render_body_tab(endpoint, form_key)
 
+    tab_labels.append("Load test")
+    tab_content["Load test"] = lambda: render_load_test_tab(endpoint, form_key, prepare_request)
+
+    tab_labels.append("Compare")
+    tab_content["Compare"] = lambda: render_compare_tab(endpoint, form_key, prepare_request)
+
     return tab_labels, tab_content
 
 
+def render_load_test_tab(endpoint, form_key, prepare_request):
+    state_key = f"load_test_{form_key}"
+    cols = st.columns(4)
+    with cols[0]:
+        mode = st.radio("Load mode", ["Concurrency", "Target RPS"], key=f"load_mode_{form_key}")
+    with cols[1]:
+        concurrency = int(st.number_input("Concurrency", min_value=1, max_value=500, value=10, key=f"load_concurrency_{form_key}"))
+    with cols[2]:
+        target_rps = st.number_input("Target RPS", min_value=1.0, value=50.0, key=f"load_rps_{form_key}",
+                                     disabled=mode != "Target RPS")
+    with cols[3]:
+        duration_s = st.number_input("Duration (s)", min_value=1, max_value=3600, value=10, key=f"load_duration_{form_key}")
+    max_requests = int(st.number_input("Max requests (0 for no limit)", min_value=0, value=0, key=f"load_max_{form_key}"))
+
+    start_col, stop_col = st.columns(2)
+    with start_col:
+        start = st.button("Start load test", key=f"load_start_{form_key}")
+    with stop_col:
+        stop = st.button("Stop", key=f"load_stop_{form_key}")
+
+    load_test = st.session_state.get(state_key)
+    if stop and load_test is not None:
+        load_test.stop()
+
+    if start and not (load_test and load_test.running):
+        try:
+            full_path, headers, json_data = prepare_request()
+        except json.JSONDecodeError:
+            st.error("Invalid JSON in request body")
+            return
+        settings = st.session_state.get("connection_settings", ConnectionSettings())
+        session = get_session(
+            st.session_state.base_url,
+            replace(settings, pool_size=max(settings.pool_size, concurrency)),
+            current_auth_settings(),
+            gated=current_policy_gate() is not None,
+        )
+        config = LoadTestConfig(
+            method=endpoint.method,
+            url=urljoin(st.session_state.base_url, full_path),
+            headers=headers,
+            json_data=json_data,
+            concurrency=concurrency,
+            target_rps=target_rps if mode == "Target RPS" else 0,
+            duration_s=duration_s,
+            max_requests=max_requests,
+            gate=current_policy_gate(),
+        )
+        load_test = LoadTest(session, config).start()
+        st.session_state[state_key] = load_test
+
+    if load_test is not None:
+        st.fragment(display_load_test_results, run_every=1 if load_test.running else None)(load_test)
+
+
+def display_load_test_results(load_test):
+    snapshot = load_test.snapshot()
+    cols = st.columns(6)
+    cols[0].metric("Requests", snapshot["requests"])
+    cols[1].metric("Throughput", f"{snapshot['throughput_rps']:.1f} rps")
+    cols[2].metric("p50", f"{snapshot['p50_ms']:.1f} ms")
+    cols[3].metric("p90", f"{snapshot['p90_ms']:.1f} ms")
+    cols[4].metric("p99", f"{snapshot['p99_ms']:.1f} ms")
+    cols[5].metric("Max", f"{snapshot['max_ms']:.1f} ms")
+    st.write(f"**Error rate:** {snapshot['error_rate']:.2%} over {snapshot['elapsed_s']:.1f} s")
+    if snapshot["policy_wait_p99_ms"]:
+        st.caption(f"Service policy wait (p99, not included in latency): {snapshot['policy_wait_p99_ms']:.1f} ms")
+
+    outcomes = [{"Outcome": str(status), "Count": count} for status, count in sorted(snapshot["status_counts"].items())]
+    outcomes += [{"Outcome": error, "Count": count} for error, count in sorted(snapshot["error_counts"].items())]
+    if outcomes:
+        st.dataframe(pd.DataFrame(outcomes), use_container_width=True)
+
+    st.caption("Running..." if snapshot["running"] else "Finished")
+
+
+def render_compare_tab(endpoint, form_key, prepare_request):
+    state_key = f"compare_{form_key}"
+    base_urls = st.multiselect("Base URLs", st.session_state.base_url_options, default=[st.session_state.base_url],
+                               key=f"compare_urls_{form_key}")
+    partitions = st.multiselect("Data partition IDs", ["partition1", "partition2"], key=f"compare_partitions_{form_key}",
+                                help="Leave empty to send the partition ID from the Headers tab")
+    custom = st.text_input("Other partition IDs (comma separated)", key=f"compare_custom_partitions_{form_key}")
+    partitions += [p.strip() for p in custom.split(",") if p.strip() and p.strip() not in partitions]
+    targets = [Target(base_url, partition) for base_url in base_urls for partition in (partitions or [None])]
+    st.caption(f"{len(targets)} targets; the first one is the baseline for latency and body comparisons.")
+
+    if st.button("Run comparison", key=f"compare_start_{form_key}", disabled=len(targets) < 2):
+        try:
+            full_path, headers, json_data = prepare_request()
+        except json.JSONDecodeError:
+            st.error("Invalid JSON in request body")
+            return
+        previous = st.session_state.get(state_key)
+        if previous is not None:
+            previous.close()
+        request = PreparedRequest(
+            service=st.session_state.current_service,
+            endpoint_key=endpoint.key,
+            method=endpoint.method,
+            url=full_path,
+            headers=headers,
+            json_data=json_data if endpoint.method in ['POST', 'PUT', 'PATCH'] else None,
+            responses=endpoint.responses,
+            gate=current_policy_gate(),
+        )
+        st.session_state[state_key] = start_comparison(get_request_executor(), current_session, request, full_path,
+                                                       targets, get_metrics_store(), current_history(),
+                                                       gates=current_policy_gate)
+
+    comparison = st.session_state.get(state_key)
+    if comparison is None:
+        return
+    if not comparison.done:
+        st.fragment(poll_comparison, run_every=0.5)(comparison, form_key)
+        return
+    display_comparison(comparison, form_key)
+
+
+def poll_comparison(comparison, form_key):
+    if comparison.done:
+        st.rerun()
+
+    st.info(f"{sum(handle.done for handle in comparison.handles)} of {len(comparison.handles)} responses received...")
+    if st.button("Cancel comparison", key=f"compare_cancel_{form_key}"):
+        comparison.cancel()
+
+
+def display_comparison(comparison, form_key):
+    st.dataframe(pd.DataFrame(comparison.summary()), hide_index=True, use_container_width=True)
+
+    baseline = comparison.targets[0]
+    for target, changes, truncated, problem in comparison.diffs():
+        st.markdown(f"**{target.label}** vs **{baseline.label}**")
+        if problem:
+            st.caption(f"Bodies not compared: {problem}.")
+        elif not changes:
+            st.caption("Bodies are identical.")
+        else:
+            st.caption(f"{len(changes)}{'+' if truncated else ''} differences")
+            st.dataframe(pd.DataFrame([
+                {"Path": change.path, "Change": change.kind,
+                 "Baseline": json.dumps(change.left, default=str)[:200] if change.kind != "added" else "",
+                 "Other": json.dumps(change.right, default=str)[:200] if change.kind != "removed" else ""}
+                for change in changes
+            ]), hide_index=True, use_container_width=True)
+
+    cols = st.columns(len(comparison.targets))
+    for i, (col, target, handle) in enumerate(zip(cols, comparison.targets, comparison.handles)):
+        with col:
+            st.markdown(f"**{target.label}**")
+            result = handle.result()
+            if result is None:
+                st.write(handle.state)
+            else:
+                display_response_body(result, f"{form_key}_compare_{i}")
+
+
 def render_path_params(endpoint, form_key):
     values = {}
-    for param in endpoint.get("path_params", []):
+    for param in endpoint.path_params:
         name = param.get("name", "")
         ptype = param.get("schema", {}).get("type", "string")
         required = param.get("required", False)
@@ -266,7 +547,7 @@ def render_path_params(endpoint, form_key):
 
 def render_query_params(endpoint, form_key):
     values = {}
-    for param in endpoint.get("query_params", []):
+    for param in endpoint.query_params:
         name = param.get("name", "")
         ptype = param.get("schema", {}).get("type", "string")
         required = param.get("required", False)
@@ -289,8 +570,8 @@ def render_headers_tab(form_key):
 
 def render_body_tab(endpoint, form_key):
     st.subheader("Enter the values for request payload either in form format or JSON format")
-    request_body = endpoint.get("requestBody", {})
-    method = endpoint.get("method", "GET")
+    request_body = endpoint.request_body
+    method = endpoint.method
     body_params = {}
     raw_json = ""
     json_input_type = "Form"
@@ -322,58 +603,36 @@ def render_body_tab(endpoint, form_key):
     return body_params, raw_json, json_input_type
 
 
-def generate_default_json_from_schema(schema):
-    defaults = {}
-    for name, prop in schema.get("properties", {}).items():
-        ptype = prop.get("type", "string")
-        if ptype == "string":
-            defaults[name] = ""
-        elif ptype in ["integer", "number"]:
-            defaults[name] = 0
-        elif ptype == "boolean":
-            defaults[name] = False
-        elif ptype == "array":
-            defaults[name] = []
-        elif ptype == "object":
-            defaults[name] = {}
-        else:
-            defaults[name] = None
-    return defaults
-
-
-def build_full_url(path_template, path_params, query_params):
-    path = process_path_parameters(path_template, path_params)
-    query = "&".join([f"{k}={v}" for k, v in query_params.items() if v not in [None, ""]])
-    return f"{path}?{query}" if query else path
-
-
-def build_headers(custom_headers, partition_id):
-    headers = {'Accept': 'application/json'}
-    headers.update(custom_headers or {})
-    headers["data-partition-id"] = partition_id
-    return headers
-
-
-
-def display_property_input(name, ptype, required, desc, key_prefix):
-    key = f"{key_prefix}_{name}"
-    label = f"{name}{' (required)' if required else ''}"
-    if ptype == "string":
-        return st.text_input(label, help=desc, key=key)
+def generate_default_json_from_schema(schema, _seen=None):
+    _seen = _seen or set()
+    if id(schema) in _seen:
+        return None
+    _seen = _seen | {id(schema)}
+
+    if "default" in schema:
+        return schema["default"]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    for variant_key in ("oneOf", "anyOf"):
+        if schema.get(variant_key):
+            return generate_default_json_from_schema(schema[variant_key][0], _seen)
+
+    ptype = schema.get("type", "object" if "properties" in schema else "string")
+    if ptype == "object":
+        return {
+            name: generate_default_json_from_schema(prop, _seen)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    elif ptype == "string":
+        return ""
     elif ptype in ["integer", "number"]:
-        return st.number_input(label, help=desc, key=key)
+        return 0
     elif ptype == "boolean":
-        return st.checkbox(label, help=desc, key=key)
+        return False
+    elif ptype == "array":
+        return []
     return None
 
-def process_path_parameters(path_template, values):
-    for key, val in values.items():
-        path_template = path_template.replace(f"{{{key}}}", str(val))
-    return path_template
-
-def prepare_request_body(body_params):
-    return body_params
-
 
 def display_property_input(prop_name, prop_type, prop_required, prop_desc, key_prefix=""):
     unique_key = f"{key_prefix}_{prop_name}"
@@ -410,7 +669,7 @@ def display_property_input(prop_name, prop_type, prop_required, prop_desc, key_p
         )
     return None
 
-def display_response(response):
+def display_response(response, form_key):
     st.subheader("Response")
     status_code = response.status_code
     if 200 <= status_code < 300:
@@ -422,114 +681,624 @@ def display_response(response):
     else:
         st.error(f"Status: {status_code}")
 
-    response_header_tab, response_body_tab = st.tabs(["Headers", "Body"])
+    display_schema_errors(response.schema_errors, status_code)
+
+    response_header_tab, response_body_tab, response_timing_tab = st.tabs(["Headers", "Body", "Timing"])
 
     with response_header_tab:
         for header, value in response.headers.items():
             st.write(f"**{header}:** {value}")
 
     with response_body_tab:
+        display_response_body(response, form_key)
+
+    with response_timing_tab:
+        display_response_timing(response.timing)
+
+
+def display_schema_errors(schema_errors, status_code):
+    if schema_errors is None:
+        return
+    if not schema_errors:
+        st.caption(f"Response matches the documented schema for status {status_code}.")
+        return
+    st.error(f"Response does not match the documented schema ({len(schema_errors)} violations)")
+    st.dataframe(
+        pd.DataFrame(schema_errors, columns=["Path", "Problem"]),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+def display_response_timing(timing):
+    if timing is None:
+        st.info("No timing recorded for this response.")
+        return
+
+    phases = timing.phases()
+    cols = st.columns(len(phases) + 1)
+    for col, (phase, value) in zip(cols, phases.items()):
+        col.metric(phase.upper() if phase in ("dns", "tls", "ttfb") else phase.capitalize(), f"{value:.1f} ms")
+    cols[-1].metric("Total", f"{timing.total_ms:.1f} ms")
+    st.bar_chart(pd.DataFrame({"ms": list(phases.values())}, index=list(phases.keys())), horizontal=True)
+    st.write(
+        f"**Request size:** {timing.request_bytes:,} bytes | **Response size:** {timing.response_bytes:,} bytes | "
+        f"**Connection:** {'reused' if timing.connection_reused else 'new'}"
+    )
+    if timing.wait_ms:
+        st.caption(f"Waited {timing.wait_ms:.1f} ms for the service policy (throttling, earlier attempts and backoff) "
+                   "before the attempt shown.")
+
+
+def display_response_body(response, form_key):
+    body = response.body
+    st.caption(
+        f"{body.size:,} bytes received in {response.elapsed_s:.3f} s"
+        + (" (spooled to disk)" if body.on_disk else "")
+    )
+    # The body is copied into Streamlit's media store only for the run after
+    # "Prepare download", not on every rerun of the page.
+    ready_key = f"download_ready_{form_key}"
+    if body.size > DOWNLOAD_LIMIT:
+        st.caption(f"Bodies over {DOWNLOAD_LIMIT // (1024 * 1024)} MiB can be paged through below but not downloaded.")
+    elif st.session_state.pop(ready_key, False):
+        st.download_button("Download body", data=body.read_all(), file_name="response_body",
+                           mime=response.content_type or None, key=f"download_body_{form_key}")
+    else:
+        st.button("Prepare download", key=f"prepare_download_{form_key}",
+                  on_click=lambda: st.session_state.update({ready_key: True}))
+
+    if body.size <= JSON_RENDER_LIMIT and not is_line_stream(response.content_type):
         try:
-            resp_json = response.json()
-            st.json(resp_json)
-        except json.JSONDecodeError:
-            st.text(response.text)
-
-def prepare_request_body(body_params, endpoint):
-    if not body_params:
-        return {}
-
-    json_data = {}
-    for param_name, param_value in body_params.items():
-        if param_value is not None and param_value != "":
-            json_data[param_name] = process_param_value(param_name, param_value, endpoint)
-    return json_data
-
-def process_param_value(param_name, param_value, endpoint):
-    request_body = endpoint.get('requestBody', {})
-    content = request_body.get('content', {}).get('application/json', {})
-    schema = content.get('schema', {})
-    properties = schema.get('properties', {})
-    prop_type = properties.get(param_name, {}).get('type', 'string')
-
-    if prop_type == 'array' and isinstance(param_value, str):
-        return [item.strip() for item in param_value.split(',')]
-    elif prop_type == 'object' and isinstance(param_value, str):
-        try:
-            return json.loads(param_value)
-        except json.JSONDecodeError:
-            return param_value
-    elif prop_type == 'number':
-        try:
-            return float(param_value)
-        except (TypeError, ValueError):
-            return param_value
-    elif prop_type == 'integer':
-        try:
-            return int(param_value)
-        except (TypeError, ValueError):
-            return param_value
-    elif prop_type == 'boolean' and isinstance(param_value, str):
-        return param_value.lower() in ('true', 'yes', '1', 'y')
+            st.json(body.json())
+            return
+        except ValueError:
+            pass
+
+    page = 0
+    if body.page_count() > 1:
+        page = int(st.number_input(f"Page (of {body.page_count()}, {PAGE_BYTES // 1024} KiB each)", min_value=1,
+                                   max_value=body.page_count(), value=1, key=f"body_page_{form_key}")) - 1
+    st.text(body.text_page(page))
+
+
+def execute_request(endpoint, path, headers, json_data, form_key):
+    request = PreparedRequest(
+        service=st.session_state.current_service,
+        endpoint_key=endpoint.key,
+        method=endpoint.method,
+        url=urljoin(st.session_state.base_url, path),
+        headers=headers,
+        json_data=json_data if endpoint.method in ['POST', 'PUT', 'PATCH'] else None,
+        responses=endpoint.responses,
+        gate=current_policy_gate(),
+    )
+    previous = st.session_state.request_handles.get(form_key)
+    if previous is not None:
+        previous.close()
+    handle = get_request_executor().submit(current_session(), request, get_metrics_store(), current_history())
+    st.session_state.request_handles[form_key] = handle
+    return handle
+
+
+def display_request_details(request):
+    st.subheader("Request Details")
+    st.markdown(f"**URL:** {request.url}")
+    st.markdown(f"**Method:** {request.method}")
 
-    return param_value
+    st.subheader("Headers")
+    st.json(request.headers)
 
+    if request.json_data:
+        st.subheader("Request Body")
+        st.json(request.json_data)
+
+
+def display_request_handle(handle, form_key):
+    display_request_details(handle.request)
+
+    if not handle.done:
+        st.fragment(poll_request_handle, run_every=0.5)(handle, form_key)
+        return
+
+    state = handle.state
+    if state == "done":
+        display_response(handle.result(), form_key)
+    elif state == "cancelled":
+        st.info("Request cancelled.")
+    else:
+        st.error(f"Error executing request: {str(handle.error())}")
+
+
+def poll_request_handle(handle, form_key):
+    if handle.done:
+        st.rerun()
+
+    st.info(f"{handle.request.method} request {handle.state} for {time.time() - handle.submitted_at:.1f} s...")
+    if handle.live_lines:
+        st.code("\n".join(handle.live_lines))
+    if st.button("Cancel request", key=f"cancel_request_{form_key}"):
+        handle.cancel()
 
-def execute_request(endpoint, path, headers, json_data):
-    try:
-        url = urljoin(st.session_state.base_url, path)
-        cookies = {}
-        if st.session_state.stoken and st.session_state.auth_method == "cookie":
-            cookies[st.session_state.auth_cookie_name] = st.session_state.stoken
 
-        st.subheader("Request Details")
-        st.markdown(f"**URL:** {url}")
-        st.markdown(f"**Method:** {endpoint['method']}")
+@st.cache_resource(max_entries=64)
+def get_tag_summaries(spec_hash, _endpoint_index):
+    return {
+        tag: pd.DataFrame(
+            [{"Method": endpoint.method, "Path": endpoint.path, "Summary": endpoint.summary} for endpoint in endpoints]
+        )
+        for tag, endpoints in _endpoint_index.by_tag.items()
+    }
+
+
+def endpoint_label(endpoint):
+    return f"{endpoint.method} {endpoint.path} - {endpoint.summary}" if endpoint.summary else endpoint.key
 
-        st.subheader("Headers")
-        st.json(headers)
 
-        if json_data and endpoint['method'] in ['POST', 'PUT', 'PATCH']:
-            st.subheader("Request Body")
-            st.json(json_data)
+@st.cache_resource(max_entries=64)
+def get_search_index(spec_hash, service_name, _endpoint_index):
+    return SearchIndex(_endpoint_index, service=service_name)
 
-        with st.spinner(f"Executing {endpoint['method']} request..."):
-            response = send_request(endpoint['method'], url, headers, cookies, json_data)
-        display_response(response)
 
-    except Exception as e:
-        st.error(f"Error executing request: {str(e)}")
+def loaded_search_indexes():
+    base_url = st.session_state.base_url
+    prefetcher = get_spec_prefetcher()
+    indexes = []
+    for name, service in get_service_registry().items():
+        future = prefetcher.fetch(service, base_url)
+        if not future.done() or future.exception() is not None:
+            continue
+        entry = future.result()
+        endpoint_index = get_endpoint_index(entry.spec_hash, entry.spec, get_index_tracker().latest((base_url, name)))
+        indexes.append(get_search_index(entry.spec_hash, name, endpoint_index))
+    return indexes
+
+
+def jump_to_search_result():
+    choice = st.session_state.endpoint_search_choice
+    if choice is None:
+        return
+    service_name, key, tag = choice
+    st.session_state.current_service = service_name
+    st.session_state.selected_endpoint = key
+    st.session_state.endpoint_tag = tag
+    st.session_state.endpoint_view_mode = "Selected endpoint"
+    st.session_state.endpoint_filter = ""
 
-def display_endpoints(endpoints_by_tag):
-    if not endpoints_by_tag:
+
+def endpoint_search_sidebar():
+    query = st.text_input("Search all services", key="endpoint_search", placeholder="e.g. get pet by id")
+    if not query.strip():
+        return
+
+    hits = search_all(loaded_search_indexes(), query)
+    if not hits:
+        st.caption("No endpoints match the search.")
+        return
+    services = st.session_state.services
+    st.radio(
+        "Search results",
+        [(hit.service, hit.endpoint.key, hit.endpoint.tags[0]) for hit in hits],
+        index=None,
+        key="endpoint_search_choice",
+        format_func=lambda choice: f"{services.get(choice[0], choice[0])}: {choice[1]}",
+        on_change=jump_to_search_result,
+    )
+
+
+def endpoint_navigation_sidebar(endpoint_index):
+    with st.sidebar:
+        st.subheader("Endpoints")
+        endpoint_search_sidebar()
+        view_mode = st.radio("Endpoint view", ["Selected endpoint", "All endpoints"], key="endpoint_view_mode")
+        if view_mode == "All endpoints":
+            return view_mode, None
+
+        tag = st.selectbox("Tag", endpoint_index.sorted_tags, key="endpoint_tag")
+        search = st.text_input("Filter endpoints", key="endpoint_filter").strip().lower()
+        candidates = [
+            endpoint for endpoint in endpoint_index.by_tag.get(tag, ())
+            if not search or search in endpoint.key.lower() or search in endpoint.summary.lower()
+        ]
+        if not candidates:
+            st.info("No endpoints match the filter.")
+            return view_mode, None
+
+        keys = [endpoint.key for endpoint in candidates]
+        current = st.session_state.get("selected_endpoint")
+        selected_key = st.selectbox(
+            "Endpoint",
+            keys,
+            index=keys.index(current) if current in keys else 0,
+            format_func=lambda key: endpoint_label(endpoint_index.get(key)),
+        )
+        st.session_state.selected_endpoint = selected_key
+        return view_mode, endpoint_index.get(selected_key)
+
+
+def display_endpoint(endpoint):
+    st.subheader(endpoint_label(endpoint))
+    st.write(f"**Description** {endpoint.description or 'No description provided'}")
+    display_request_form(endpoint, endpoint.key)
+
+
+def display_endpoints(endpoint_index):
+    if not endpoint_index:
         st.warning("No endpoints available. Please check your connection to the API server.")
         return
 
-    sorted_tags = sorted(endpoints_by_tag.keys())
-    for tag in sorted_tags:
+    summaries = get_tag_summaries(endpoint_index.spec_hash, endpoint_index)
+    view_mode, selected_endpoint = endpoint_navigation_sidebar(endpoint_index)
+
+    if view_mode == "Selected endpoint":
+        tag = st.session_state.endpoint_tag
         st.header(f"{tag}")
-        endpoint_data = [{"Method": endpoint["method"], "Path": endpoint["path"], "Summary": endpoint["summary"]} for endpoint in endpoints_by_tag[tag]]
-        df = pd.DataFrame(endpoint_data)
-        st.dataframe(df, use_container_width=True)
-
-        for idx, endpoint in enumerate(endpoints_by_tag[tag]):
-            with st.expander(f"{endpoint['method']} {endpoint['path']} - {endpoint['summary']}"):
-                st.write(f"**Description** {endpoint.get('description', 'No description provided')}")
-                display_request_form(endpoint, f"{tag}_{idx}")
-
-def send_request(method, url, headers, cookies, json_data):
-    if method == 'GET':
-        return requests.get(url=url, headers=headers, cookies=cookies, timeout=30)
-    elif method == 'POST':
-        return requests.post(url=url, json=json_data, headers=headers, cookies=cookies, timeout=30)
-    elif method == 'PUT':
-        return requests.put(url=url, json=json_data, headers=headers, cookies=cookies, timeout=30)
-    elif method == 'DELETE':
-        return requests.delete(url=url, headers=headers, cookies=cookies, timeout=30)
-    elif method == 'PATCH':
-        return requests.patch(url=url, json=json_data, headers=headers, cookies=cookies, timeout=30)
+        st.dataframe(summaries[tag], use_container_width=True)
+        if selected_endpoint is not None:
+            display_endpoint(selected_endpoint)
+        return
+
+    for tag in endpoint_index.sorted_tags:
+        st.header(f"{tag}")
+        st.dataframe(summaries[tag], use_container_width=True)
+
+        # Only opened endpoints render a form; every keyed widget of a form stays
+        # in session state, so rendering all of them grows with the spec.
+        opened = st.multiselect("Open endpoints", [endpoint.key for endpoint in endpoint_index.by_tag[tag]],
+                                key=f"open_endpoints_{tag}",
+                                format_func=lambda key: endpoint_label(endpoint_index.get(key)))
+        for key in opened:
+            endpoint = endpoint_index.get(key)
+            with st.expander(endpoint_label(endpoint), expanded=True):
+                st.write(f"**Description** {endpoint.description or 'No description provided'}")
+                display_request_form(endpoint, f"{tag}_{endpoint.key}")
+
+def display_collections(endpoint_index):
+    st.header("Request Collections")
+    names = list_collections()
+    selected = st.selectbox("Collection", ["(new collection)"] + names, key="collection_selected")
+    if selected in names:
+        try:
+            collection = load_collection(selected)
+        except WorkflowError as e:
+            st.error(str(e))
+            return
     else:
-        raise ValueError(f"Unsupported HTTP method: {method}")
+        collection = {"service": st.session_state.current_service, "variables": {}, "steps": []}
+
+    with st.expander("Available operations"):
+        st.write(", ".join(f"`{operation_id}`" for operation_id in sorted(endpoint_index.by_operation_id)))
+
+    raw_collection = st.text_area("Collection JSON", value=json.dumps(collection, indent=2), height=320,
+                                  key=f"collection_json_{selected}")
+    name = st.text_input("Collection name", value=selected if selected in names else "", key=f"collection_name_{selected}")
+
+    save_col, run_col = st.columns(2)
+    with save_col:
+        save = st.button("Save collection", key="collection_save")
+    with run_col:
+        run = st.button("Run collection", key="collection_run")
+    if not (save or run):
+        return
+
+    try:
+        collection = json.loads(raw_collection)
+    except json.JSONDecodeError as e:
+        st.error(f"Invalid collection JSON: {e}")
+        return
+
+    if save:
+        if not name:
+            st.error("Enter a collection name before saving.")
+            return
+        try:
+            save_collection(name, collection)
+        except WorkflowError as e:
+            st.error(str(e))
+            return
+        st.success(f"Saved collection '{name}'")
+
+    if run:
+        runner = WorkflowRunner(
+            current_session(),
+            endpoint_index,
+            st.session_state.base_url,
+            partition_id=st.session_state.get("data_partition_id", ""),
+            gate=current_policy_gate(),
+        )
+        try:
+            with st.spinner("Running collection..."):
+                results, variables = runner.run(collection)
+        except WorkflowError as e:
+            st.error(str(e))
+            return
+
+        st.dataframe(pd.DataFrame([
+            {"Step": r.step_id, "Result": r.status, "Status": r.status_code, "Latency (ms)": r.latency_ms, "Error": r.error}
+            for r in results
+        ]), use_container_width=True)
+        st.subheader("Variables")
+        st.json(variables)
+
+
+def display_history():
+    st.header("Request History")
+    history = current_history()
+    stats = history.stats()
+    st.caption(f"{stats['entries']:,} entries, {stats['stored_bytes']:,} bytes of stored bodies")
+
+    service_col, endpoint_col, status_col, latency_col = st.columns(4)
+    with service_col:
+        service = st.selectbox("Service", ["All"] + history.distinct("service"), key="history_service")
+    with endpoint_col:
+        endpoint = st.selectbox("Endpoint", ["All"] + history.distinct("endpoint"), key="history_endpoint")
+    with status_col:
+        status = st.selectbox("Status", ["All", "2xx", "3xx", "4xx", "5xx"], key="history_status")
+    with latency_col:
+        min_latency = st.number_input("Min latency (ms)", min_value=0.0, value=0.0, key="history_min_latency")
+    order_by = st.radio("Sort by", ["created_at", "latency_ms"], horizontal=True, key="history_order",
+                        format_func=lambda column: "Newest" if column == "created_at" else "Slowest")
+
+    entries = history.search(
+        service=None if service == "All" else service,
+        endpoint=None if endpoint == "All" else endpoint,
+        status=None if status == "All" else status,
+        min_latency_ms=min_latency or None,
+        order_by=order_by,
+    )
+    if not entries:
+        st.info("No requests recorded yet.")
+        return
+
+    table = pd.DataFrame(entries)
+    table["created_at"] = pd.to_datetime(table["created_at"], unit="s")
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
+    ids = [entry["id"] for entry in entries]
+    view_col, compare_col = st.columns(2)
+    with view_col:
+        entry_id = st.selectbox("Show entry", ids, key="history_entry")
+    with compare_col:
+        compare_id = st.selectbox("Compare with", [None] + ids, key="history_compare")
+
+    entry = history.get(entry_id)
+    if compare_id is not None:
+        st.code(diff_entries(history.get(compare_id), entry) or "No differences", language="diff")
+    elif entry is not None:
+        st.markdown(f"**{entry['method']} {entry['url']}** - status {entry['status']} in {entry['latency_ms']:.1f} ms")
+        request_tab, headers_tab, body_tab = st.tabs(["Request", "Response headers", "Response body"])
+        with request_tab:
+            st.json(entry["request_headers"])
+            if entry["request_body"] is not None:
+                st.json(entry["request_body"])
+        with headers_tab:
+            st.json(entry["response_headers"])
+        with body_tab:
+            if not entry["body_captured"]:
+                st.info(f"Body of {entry['response_size']:,} bytes was too large to keep.")
+            else:
+                st.code(body_text(entry)[:JSON_RENDER_LIMIT])
+
+    prune_col, clear_col = st.columns(2)
+    with prune_col:
+        if st.button("Prune old entries", key="history_prune"):
+            st.success(f"Removed {history.prune()} entries")
+    with clear_col:
+        if st.button("Clear history", key="history_clear"):
+            history.clear()
+            st.rerun()
+
+
+def mock_server_sidebar(cached_spec, endpoint_index):
+    servers = get_mock_servers()
+    service = get_service_registry()[st.session_state.current_service]
+    with st.sidebar.expander("Mock server"):
+        port = int(st.number_input("Port", min_value=1024, max_value=65535, value=8080, key="mock_port"))
+        settings = MockSettings(
+            latency_ms=st.number_input("Latency (ms)", min_value=0.0, value=0.0, key="mock_latency"),
+            jitter_ms=st.number_input("Jitter (ms)", min_value=0.0, value=0.0, key="mock_jitter"),
+            error_rate=st.slider("Error rate", 0.0, 1.0, 0.0, key="mock_error_rate"),
+            error_status=int(st.number_input("Error status", min_value=400, max_value=599, value=500, key="mock_error_status")),
+        )
+
+        server = servers.get(port)
+        if server is None:
+            if st.button("Start mock server", key="mock_start"):
+                try:
+                    server = create_mock_server(endpoint_index, spec=cached_spec.spec, spec_path=service.spec_path,
+                                                port=port, settings=settings).start()
+                except OSError as e:
+                    st.error(f"Could not start mock server: {e}")
+                    return
+                servers[port] = server
+                if server.url not in st.session_state.base_url_options:
+                    st.session_state.base_url_options.append(server.url)
+                st.rerun()
+            return
+
+        server.settings = settings
+        st.write(f"Serving {service.display_name} on {server.url}")
+        st.caption(f"{server.stats.requests:,} requests, {server.stats.injected_errors:,} injected errors, "
+                   f"{server.stats.not_found:,} unmatched")
+        if st.button("Stop mock server", key="mock_stop"):
+            server.stop()
+            del servers[port]
+            st.rerun()
+
+
+def code_export_sidebar(endpoint_index):
+    service = st.session_state.current_service
+    cases = st.session_state.export_cases.get(service, [])
+    with st.sidebar.expander("Export client code"):
+        if cases:
+            st.caption(f"{len(cases)} recorded requests")
+            if st.button("Clear recorded requests", key="export_clear"):
+                st.session_state.export_cases.pop(service, None)
+                st.rerun()
+        else:
+            st.caption("No recorded requests yet; the suite will call each endpoint once with generated values.")
+
+        export_key = (service, endpoint_index.spec_hash, len(cases))
+        if st.button("Generate client and tests", key="export_generate"):
+            st.session_state.export_files = (export_key, generate_code(endpoint_index, service, st.session_state.base_url,
+                                                                       cases=cases))
+        generated = st.session_state.get("export_files")
+        if generated is not None and generated[0] == export_key:
+            for filename, source in generated[1].items():
+                st.download_button(filename, source, file_name=filename, mime="text/x-python",
+                                   key=f"export_download_{filename}")
+
+
+def service_policy_sidebar():
+    service = get_service_registry()[st.session_state.current_service]
+    with st.sidebar.expander("Service policies"):
+        if service.policy.enabled:
+            defaults = ServicePolicy()
+            st.json({name: value for name, value in asdict(service.policy).items() if value != getattr(defaults, name)})
+        else:
+            st.caption(f"No policy configured for {service.display_name}.")
+
+        snapshots = gate_snapshots()
+        if snapshots:
+            columns = ["requests", "attempts", "throttled", "retried", "retry_after", "rejected", "breaker_opened"]
+            table = pd.DataFrame.from_dict(snapshots, orient="index").reindex(columns=columns + ["breaker"])
+            table[columns] = table[columns].fillna(0).astype(int)
+            st.dataframe(table, use_container_width=True)
+
+
+def active_session_states():
+    # Streamlit has no public API for other sessions' state, so this reads the
+    # runtime's session manager. Streamlit is pinned in requirements.txt, and
+    # tests/test_session_states.py fails if an upgrade moves the attribute.
+    sessions = Runtime.instance()._session_mgr.list_active_sessions()
+    return {info.session.id: info.session.session_state for info in sessions}
+
+
+def session_states():
+    ctx = get_script_run_ctx()
+    current = ctx.session_id if ctx is not None else None
+    try:
+        states = active_session_states()
+    except (RuntimeError, AttributeError):
+        # No runtime, or AppTest's mock one.
+        states = {}
+        st.caption("Other sessions cannot be listed here; only this session is measured.")
+    if current not in states:
+        states[current] = st.session_state.to_dict()
+    return current, states
+
+
+def memory_usage_sidebar():
+    with st.sidebar.expander("Memory usage"):
+        if not st.button("Measure memory usage", key="measure_memory"):
+            st.caption("Measures each session's state and the specs and endpoint indexes shared by all sessions.")
+            return
+
+        # Shared objects are measured first, and every session walk stops at
+        # them, so a spec or endpoint a session references is not counted again.
+        shared_ids = set()
+        specs = {}
+        for (_, service_name), entry in get_spec_cache().entries():
+            specs.setdefault(entry.spec_hash, (entry.spec, set()))[1].add(service_name)
+        indexes = {index.spec_hash: index for index in get_index_tracker().indexes()}
+        shared = [
+            {"Spec": spec_hash[:12], "Services": ", ".join(sorted(names)),
+             "Bytes": deep_sizeof((spec, indexes.pop(spec_hash, None)), shared_ids)}
+            for spec_hash, (spec, names) in specs.items()
+        ]
+        shared += [{"Spec": spec_hash[:12], "Services": "(index only)", "Bytes": deep_sizeof(index, shared_ids)}
+                   for spec_hash, index in indexes.items()]
+
+        current, states = session_states()
+        sizes = {}
+        for session_id, state in states.items():
+            try:
+                sizes[session_id] = deep_sizeof(state, exclude=shared_ids)
+            except RuntimeError:
+                # The session changed its state while it was being walked.
+                sizes[session_id] = None
+        sessions = [
+            {"Session": f"{(session_id or 'current')[:8]}{' (this session)' if session_id == current else ''}",
+             "Bytes": size}
+            for session_id, size in sizes.items()
+        ]
+        keys = [{"Key": key, "Bytes": deep_sizeof(value, exclude=shared_ids)} for key, value in st.session_state.items()]
+
+        cols = st.columns(3)
+        cols[0].metric("This session", format_bytes(sizes[current] or 0))
+        cols[1].metric(f"All sessions ({len(sessions)})", format_bytes(sum(row["Bytes"] or 0 for row in sessions)))
+        cols[2].metric("Shared", format_bytes(sum(row["Bytes"] for row in shared)))
+        st.dataframe(pd.DataFrame(sessions).sort_values("Bytes", ascending=False), hide_index=True,
+                     use_container_width=True)
+        if keys:
+            st.caption("Largest keys in this session")
+            st.dataframe(pd.DataFrame(keys).sort_values("Bytes", ascending=False).head(10),
+                         hide_index=True, use_container_width=True)
+        if shared:
+            st.dataframe(pd.DataFrame(shared), hide_index=True, use_container_width=True)
+
+
+@st.cache_resource
+def get_mock_servers():
+    return {}
+
+
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
+
+
+@st.cache_resource
+def get_metrics_store():
+    return MetricsStore()
+
+
+@st.cache_resource
+def get_request_executor():
+    return RequestExecutor()
+
+
+def current_auth_settings():
+    if st.session_state.auth_method == "header":
+        return AuthSettings(
+            method="header",
+            token=st.session_state.stoken,
+            header_name=st.session_state.auth_header_name,
+            header_prefix=st.session_state.auth_header_prefix,
+        )
+    return AuthSettings(method="cookie", token=st.session_state.stoken, cookie_name=st.session_state.auth_cookie_name)
+
+
+def current_policy_gate(base_url=None):
+    service = get_service_registry()[st.session_state.current_service]
+    return policy_gate(service.name, service.policy, base_url or st.session_state.base_url)
+
+
+def history_owner():
+    # The server is shared, so each user sees only their own history: signed-in
+    # users by email, everyone else by a random key kept in the page URL, which
+    # survives reloads and bookmarks but is not guessable by other users.
+    user = getattr(st, "user", None)
+    if user is not None and user.get("is_logged_in") and user.get("email"):
+        return f"user:{user.get('email')}"
+    if "history_key" not in st.session_state:
+        st.session_state.history_key = st.query_params.get("history") or secrets.token_urlsafe(16)
+    if st.query_params.get("history") != st.session_state.history_key:
+        st.query_params["history"] = st.session_state.history_key
+    return f"key:{st.session_state.history_key}"
+
+
+def current_history():
+    return OwnerHistory(get_history_store(), history_owner())
+
+
+def current_session(base_url=None):
+    return get_session(
+        base_url or st.session_state.base_url,
+        st.session_state.get("connection_settings", ConnectionSettings()),
+        current_auth_settings(),
+        gated=current_policy_gate(base_url) is not None,
+    )
 
 def main():
     st.set_page_config(layout="wide", page_title="API Tester")
@@ -538,15 +1307,28 @@ def main():
 
     initialize_session_state()
     api_configuration_sidebar()
+    prefetch_service_specs()
 
     with st.spinner("Loading OpenAPI specification..."):
-        openapi_spec = load_openapi_spec()
-
-    if openapi_spec:
-        tags = process_openapi_spec(openapi_spec)
-        display_endpoints(tags)
+        cached_spec = load_openapi_spec()
+
+    if cached_spec:
+        endpoint_index = current_endpoint_index(cached_spec)
+        if st.session_state.watch_spec:
+            st.fragment(watch_spec, run_every=SPEC_POLL_SECONDS)(cached_spec.spec_hash)
+        mock_server_sidebar(cached_spec, endpoint_index)
+        code_export_sidebar(endpoint_index)
+        service_policy_sidebar()
+        endpoints_tab, collections_tab, history_tab = st.tabs(["Endpoints", "Collections", "History"])
+        with endpoints_tab:
+            display_endpoints(endpoint_index)
+        with collections_tab:
+            display_collections(endpoint_index)
+        with history_tab:
+            display_history()
     else:
         st.warning("Unable to load OpenAPI specification. Please check the base URL and try again.")
+    memory_usage_sidebar()
 
 if __name__ == "__main__":
     main()
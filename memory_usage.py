@@ -0,0 +1,51 @@
+import sys
+import threading
+import types
+from concurrent.futures import Executor
+
+# Process-wide machinery reachable from session objects; it is not part of any
+# one session's data, so the walk stops there.
+OPAQUE_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.CodeType,
+    types.FrameType, threading.Thread, Executor,
+)
+
+
+def _children(obj):
+    if isinstance(obj, dict):
+        yield from obj.keys()
+        yield from obj.values()
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        yield from obj
+    else:
+        if hasattr(obj, "__dict__"):
+            yield vars(obj)
+        for cls in type(obj).__mro__:
+            slots = getattr(cls, "__slots__", ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                value = getattr(obj, name, None)
+                if value is not None:
+                    yield value
+
+
+def deep_sizeof(obj, seen=None, exclude=frozenset()):
+    # Objects already in `seen` are not counted again, so callers can share one
+    # set across several roots. Ids in `exclude` are skipped without being added.
+    seen = set() if seen is None else seen
+    total, pending = 0, [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or id(obj) in exclude or isinstance(obj, OPAQUE_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj, 0)
+        pending.extend(_children(obj))
+    return total
+
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+
+from fuzzer import CaseGenerator
+from openapi_manager import load_spec_source, process_openapi_spec, spec_location
+from service_registry import load_service_registry
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 15
+PATH_PARAM = re.compile(r"\{([^}/]+)\}")
+REASONS = {200: "OK", 201: "Created", 202: "Accepted", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+@dataclass
+class MockSettings:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+
+
+@dataclass
+class MockRoute:
+    endpoint_key: str
+    status: int
+    content_type: str
+    body: bytes
+    pattern: re.Pattern = None
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    injected_errors: int = 0
+    not_found: int = 0
+    by_endpoint: dict = field(default_factory=dict)
+
+
+def example_body(response, generator):
+    content = response.get("content", {})
+    if not content:
+        return "application/json", None
+    content_type, media = next(((k, v) for k, v in content.items() if "json" in k), next(iter(content.items())))
+    if "example" in media:
+        return content_type, media["example"]
+    if media.get("examples"):
+        return content_type, next(iter(media["examples"].values())).get("value")
+    schema = media.get("schema") or {}
+    if "example" in schema:
+        return content_type, schema["example"]
+    return content_type, generator.valid(schema)
+
+
+def success_response(responses):
+    codes = sorted(code for code in responses if code.isdigit() and code.startswith("2"))
+    if codes:
+        return int(codes[0]), responses[codes[0]]
+    if "default" in responses:
+        return 200, responses["default"]
+    return 200, {}
+
+
+def compile_route(endpoint, generator):
+    status, response = success_response(endpoint.responses or {})
+    content_type, payload = example_body(response, generator)
+    if status == 204 or payload is None and not response.get("content"):
+        body = b""
+    elif isinstance(payload, str) and "json" not in content_type:
+        body = payload.encode()
+    else:
+        body = json.dumps(payload).encode()
+
+    pattern = None
+    if PATH_PARAM.search(endpoint.path):
+        parts = PATH_PARAM.split(endpoint.path)
+        regex = "".join(re.escape(part) if i % 2 == 0 else "[^/]+" for i, part in enumerate(parts))
+        pattern = re.compile(f"^{regex}$")
+    return MockRoute(endpoint.key, status, content_type, body, pattern)
+
+
+class RouteTable:
+    def __init__(self, endpoint_index, seed=0):
+        generator = CaseGenerator(seed)
+        self.static = {}
+        self.templated = {}
+        self.paths = set()
+        for endpoint in endpoint_index:
+            route = compile_route(endpoint, generator)
+            if route.pattern is None:
+                self.static[(endpoint.method, endpoint.path)] = route
+                self.paths.add(endpoint.path)
+            else:
+                self.templated.setdefault(endpoint.method, []).append(route)
+        for routes in self.templated.values():
+            # Prefer the most literal template when several match, e.g. /pets/mine over /pets/{id}.
+            routes.sort(key=lambda route: -len(PATH_PARAM.sub("", route.endpoint_key)))
+        self.static_files = {}
+
+    def add_static(self, path, content_type, body):
+        self.static_files[path] = MockRoute(f"GET {path}", 200, content_type, body)
+
+    def match(self, method, path):
+        route = self.static.get((method, path))
+        if route is not None:
+            return route, True
+        if method == "GET" and path in self.static_files:
+            return self.static_files[path], True
+        for route in self.templated.get(method, ()):
+            if route.pattern.match(path):
+                return route, True
+        known = path in self.paths or any(
+            route.pattern.match(path) for routes in self.templated.values() for route in routes
+        )
+        return None, known
+
+
+class MockServer:
+    def __init__(self, routes, host="127.0.0.1", port=8080, settings=None):
+        self.routes = routes
+        self.host = host
+        self.port = port
+        self.settings = settings or MockSettings()
+        self.stats = MockStats()
+        self._rng = random.Random()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._connections = set()
+        self._started = threading.Event()
+        self._error = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def running(self):
+        return self._server is not None and self._server.is_serving()
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, backlog=1024, limit=MAX_HEADER_BYTES
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+            finally:
+                await self._close_connections()
+
+    async def _close_connections(self):
+        # Keep-alive handlers would otherwise be cancelled at loop shutdown and
+        # report CancelledError; end them here while the loop still runs.
+        connections = [task for task in self._connections if not task.done()]
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+
+    def start(self):
+        def run():
+            try:
+                asyncio.run(self.serve())
+            except Exception as e:
+                self._error = e
+                self._started.set()
+
+        self._thread = threading.Thread(target=run, name=f"mock-server-{self.port}", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, 413, "application/json", b'{"error": "headers too large"}', False)
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    await self._write(writer, 400, "application/json", b'{"error": "malformed request line"}', False)
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                if headers.get("transfer-encoding"):
+                    # Chunked bodies are not decoded; reading on would treat the
+                    # chunks as the next request.
+                    await self._write(writer, 411, "application/json",
+                                      b'{"error": "send the body with Content-Length, not Transfer-Encoding"}', False)
+                    break
+                length = headers.get("content-length") or "0"
+                if not length.isdigit():
+                    await self._write(writer, 400, "application/json", b'{"error": "malformed Content-Length"}', False)
+                    break
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    await self._write(writer, 413, "application/json", b'{"error": "request body too large"}', False)
+                    break
+                if length:
+                    try:
+                        await asyncio.wait_for(reader.readexactly(length), KEEP_ALIVE_TIMEOUT)
+                    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                        break
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                status, content_type, body = await self._respond(method.upper(), target.split("?", 1)[0])
+                await self._write(writer, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    break
+        except asyncio.CancelledError:
+            # Finish normally: asyncio's stream callback reports a cancelled
+            # handler task as an error.
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _respond(self, method, path):
+        stats, settings = self.stats, self.settings
+        stats.requests += 1
+        route, known = self.routes.match(method, path)
+        if route is None:
+            stats.not_found += 1
+            if known:
+                return 405, "application/json", b'{"error": "method not allowed"}'
+            return 404, "application/json", json.dumps({"error": f"no route for {method} {path}"}).encode()
+
+        stats.by_endpoint[route.endpoint_key] = stats.by_endpoint.get(route.endpoint_key, 0) + 1
+        delay = settings.latency_ms + (self._rng.uniform(-settings.jitter_ms, settings.jitter_ms) if settings.jitter_ms else 0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if settings.error_rate and self._rng.random() < settings.error_rate:
+            stats.injected_errors += 1
+            return settings.error_status, "application/json", b'{"error": "injected failure"}'
+        return route.status, route.content_type, route.body
+
+    async def _write(self, writer, status, content_type, body, keep_alive):
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+def create_mock_server(endpoint_index, spec=None, spec_path="", host="127.0.0.1", port=8080, settings=None, seed=0):
+    routes = RouteTable(endpoint_index, seed=seed)
+    if spec is not None:
+        routes.add_static(f"{spec_path}/openapi.json", "application/json", json.dumps(spec, default=str).encode())
+    return MockServer(routes, host=host, port=port, settings=settings)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve canned responses for a service's OpenAPI spec.")
+    parser.add_argument("service", help="Service name from the service registry")
+    parser.add_argument("--spec-file", help="Read the spec from a local JSON or YAML file instead of the registry source")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000", help="Where to download the spec from")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = load_service_registry()[args.service]
+    spec = load_spec_source(args.spec_file or spec_location(service, args.base_url))[0].spec
+
+    server = create_mock_server(
+        process_openapi_spec(spec),
+        spec=spec,
+        spec_path=service.spec_path,
+        host=args.host,
+        port=args.port,
+        settings=MockSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status),
+        seed=args.seed,
+    )
+    print(f"Serving {len(server.routes.static) + sum(map(len, server.routes.templated.values()))} routes "
+          f"for {args.service} on {server.url}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,360 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 import streamlit as st
 import requests
 
+from endpoint_index import HTTP_METHODS, Endpoint, EndpointIndex
+from http_client import get_session
+from request_builder import UrlBuilder
+from schema_resolver import SchemaResolver
+from service_registry import load_service_registry
+from spec_diff import diff_indexes, index_fingerprints, operation_fingerprints
+from spec_loader import is_url, load_spec
+
+SPEC_CACHE_TTL_SECONDS = 300
+SPEC_CACHE_MAX_ENTRIES = 32
+SPEC_PREFETCH_WORKERS = 8
+SPEC_CHANGELOG_LENGTH = 20
+
+
+@dataclass
+class CachedSpec:
+    spec: dict
+    spec_hash: str
+    etag: str = None
+    last_modified: str = None
+    validated_at: float = 0.0
+    sources: tuple = ()
+
+
+class SpecCache:
+    def __init__(self, ttl=SPEC_CACHE_TTL_SECONDS, max_entries=SPEC_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry, max_age=None):
+        return time.monotonic() - entry.validated_at < (self.ttl if max_age is None else max_age)
+
+    def put(self, key, entry):
+        with self._lock:
+            # Base URLs and services that serve the same document share one parsed
+            # copy; cached specs are never modified after loading.
+            shared = next((e.spec for e in self._entries.values() if e.spec_hash == entry.spec_hash), None)
+            if shared is not None:
+                entry.spec = shared
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def entries(self):
+        with self._lock:
+            return list(self._entries.items())
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+
+class SpecPrefetcher:
+    def __init__(self, cache, max_workers=SPEC_PREFETCH_WORKERS):
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spec-prefetch")
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _needs_fetch(self, key, future, max_age=None):
+        if future is None:
+            return True
+        if not future.done():
+            return False
+        if future.exception() is not None:
+            return True
+        entry = self.cache.get(key)
+        return entry is None or not self.cache.is_fresh(entry, max_age)
+
+    def fetch(self, service, base_url, force_refresh=False, max_age=None):
+        service_url = f"{base_url}{service.spec_path}"
+        key = (service_url, service.name)
+        with self._lock:
+            future = self._futures.get(key)
+            if force_refresh or self._needs_fetch(key, future, max_age):
+                future = self._pool.submit(
+                    get_cached_spec, service.name, service_url, force_refresh=force_refresh, cache=self.cache,
+                    max_age=max_age, location=spec_location(service, base_url),
+                )
+                self._futures[key] = future
+            return future
+
+    def prefetch_all(self, services, base_url, first=None):
+        # The pool runs fetches in submission order, so the service the user is
+        # looking at goes ahead of the background downloads.
+        if first in services:
+            self.fetch(services[first], base_url)
+        for service in services.values():
+            self.fetch(service, base_url)
+
+    def status(self, service, base_url):
+        future = self._futures.get((f"{base_url}{service.spec_path}", service.name))
+        if future is None:
+            return "not loaded"
+        if not future.done():
+            return "loading"
+        if future.exception() is not None:
+            return f"error: {future.exception()}"
+        return "ready"
+
+
+class IndexTracker:
+    def __init__(self, changelog_length=SPEC_CHANGELOG_LENGTH):
+        self.changelog_length = changelog_length
+        self._latest = {}
+        self._changelog = {}
+        self._lock = threading.Lock()
+
+    def latest(self, key):
+        with self._lock:
+            return self._latest.get(key)
+
+    def update(self, key, index):
+        with self._lock:
+            previous = self._latest.get(key)
+            self._latest[key] = index
+        if previous is None or previous is index or previous.spec_hash == index.spec_hash:
+            return None
+
+        change = diff_indexes(previous, index)
+        if change:
+            with self._lock:
+                changelog = self._changelog.setdefault(key, [])
+                changelog.append(change)
+                del changelog[:-self.changelog_length]
+        return change
+
+    def changelog(self, key):
+        with self._lock:
+            return list(self._changelog.get(key, ()))
+
+    def indexes(self):
+        with self._lock:
+            return list(self._latest.values())
+
+
+@st.cache_resource
+def get_spec_cache():
+    return SpecCache()
+
+
+@st.cache_resource
+def get_service_registry():
+    return load_service_registry()
+
+
+@st.cache_resource
+def get_spec_prefetcher():
+    return SpecPrefetcher(get_spec_cache())
+
+
+@st.cache_resource
+def get_index_tracker():
+    return IndexTracker()
+
+
+def prefetch_service_specs():
+    get_spec_prefetcher().prefetch_all(get_service_registry(), st.session_state.base_url,
+                                       first=st.session_state.current_service)
+
+
 def load_openapi_spec():
-    url_open_api_mappings = {
-        "Service1": "/service1",
-        "Service2": "/service2",
-        "Service3": "/service3",
-    }
-    service_name = st.session_state.current_service
-    url = f"{st.session_state.base_url}{url_open_api_mappings[service_name]}"
-    response = fetch_openapi_spec(service_name, url)
-    return response
-
-def fetch_openapi_spec(service_name, base_url):
+    service = get_service_registry()[st.session_state.current_service]
+    force_refresh = st.session_state.pop("refresh_spec", False)
+    return fetch_openapi_spec(service, st.session_state.base_url, force_refresh=force_refresh)
+
+
+def spec_location(service, base_url):
+    return service.spec_source or f"{base_url}{service.spec_path}/openapi.json"
+
+
+def download_openapi_spec(url, cached=None, timeout=5):
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    response = get_session(url).get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached is not None:
+        cached.validated_at = time.monotonic()
+        return cached, False
+    response.raise_for_status()
+
+    loaded = load_spec(url, raw=response.content)
+    entry = CachedSpec(
+        spec=loaded.spec,
+        spec_hash=loaded.spec_hash,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        validated_at=time.monotonic(),
+        sources=loaded.sources,
+    )
+    return entry, True
+
+
+def _file_signature(path, sources):
+    paths = [path, *(location for location, _ in sources if not is_url(location))]
+    return ",".join(f"{stat.st_mtime_ns}:{stat.st_size}" for stat in map(os.stat, paths))
+
+
+def read_local_spec(path, cached=None):
+    # A file whose modification time and size are unchanged is not re-read.
+    if cached is not None:
+        try:
+            unchanged = _file_signature(path, cached.sources) == cached.etag
+        except OSError:
+            unchanged = False
+        if unchanged:
+            cached.validated_at = time.monotonic()
+            return cached, False
+
+    loaded = load_spec(path)
+    entry = CachedSpec(
+        spec=loaded.spec,
+        spec_hash=loaded.spec_hash,
+        etag=_file_signature(path, loaded.sources),
+        validated_at=time.monotonic(),
+        sources=loaded.sources,
+    )
+    return entry, cached is None or cached.spec_hash != entry.spec_hash
+
+
+def load_spec_source(location, cached=None):
+    if is_url(location):
+        return download_openapi_spec(location, cached)
+    return read_local_spec(location, cached)
+
+
+def get_cached_spec(service_name, base_url, force_refresh=False, cache=None, max_age=None, location=None):
+    cache = cache or get_spec_cache()
+    key = (base_url, service_name)
+    if force_refresh:
+        cache.invalidate(key)
+
+    cached = cache.get(key)
+    if cached is not None and cache.is_fresh(cached, max_age):
+        cache.record("hits")
+        return cached
+
+    entry, modified = load_spec_source(location or f"{base_url}/openapi.json", cached)
+    cache.record("misses" if modified else "not_modified")
+    cache.put(key, entry)
+    return entry
+
+
+def fetch_openapi_spec(service, base_url, force_refresh=False):
     try:
-        url = f"{base_url}/openapi.json"
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            spec = response.json()
-            st.session_state.openapi_specs[service_name] = spec
-            return spec
-        else:
-            st.error(f"Failed to fetch OpenAPI spec for {service_name}: {response.status_code}")
-            return None
+        return get_spec_prefetcher().fetch(service, base_url, force_refresh=force_refresh).result()
+    except requests.HTTPError as e:
+        st.error(f"Failed to fetch OpenAPI spec for {service.name}: {e.response.status_code}")
+        return None
     except Exception as e:
         st.error(f"Error fetching OpenAPI spec: {str(e)}")
         return None
 
-def process_openapi_spec(openapi_spec):
+def _merge_parameters(path_parameters, operation_parameters):
+    merged = {(p.get("name"), p.get("in")): p for p in path_parameters}
+    merged.update({(p.get("name"), p.get("in")): p for p in operation_parameters})
+    return tuple(merged.values())
+
+
+def process_openapi_spec(openapi_spec, spec_hash=None, previous=None):
     if not openapi_spec:
-        return {}
+        return EndpointIndex(spec_hash=spec_hash)
 
-    paths = openapi_spec.get("paths", {})
-    tags_by_path = {}
-    endpoints_by_tag = {}
+    # Operations whose definition and referenced components are unchanged since
+    # the previous version keep their already-resolved Endpoint records.
+    fingerprints, reusable = None, {}
+    if previous:
+        fingerprints = operation_fingerprints(openapi_spec)
+        previous_fingerprints = index_fingerprints(previous)
+        reusable = {
+            key: previous.get(key) for key, fingerprint in fingerprints.items()
+            if previous_fingerprints.get(key) == fingerprint
+        }
 
-    for path, methods in paths.items():
+    resolver = SchemaResolver(openapi_spec)
+    endpoints = []
+    for path, methods in openapi_spec.get("paths", {}).items():
+        methods = resolver.resolve(methods) if "$ref" in methods else methods
+        path_parameters = resolver.resolve(methods.get("parameters", []))
         for method, details in methods.items():
-            if method.lower() in ["get", "post", "put", "delete", "patch"]:
-                tags = details.get("tags", ["default"])
-                tags_by_path[f"{method.upper()} {path}"] = tags[0] if tags else "default"
-
-                for tag in tags:
-                    if tag not in endpoints_by_tag:
-                        endpoints_by_tag[tag] = []
-
-                    path_params = []
-                    for param in details.get("parameters", []):
-                        if param.get("in") == "path":
-                            path_params.append(param)
-
-                    query_params = []
-                    for param in details.get("parameters", []):
-                        if param.get("in") == "query":
-                            query_params.append(param)
-
-                    request_body = details.get("requestBody", {})
-                    if request_body and "content" in request_body:
-                        for content_type, content_details in request_body["content"].items():
-                            if "schema" in content_details and "$ref" in content_details["schema"]:
-                                ref_path = content_details["schema"]["$ref"]
-                                schema_name = ref_path.split("/")[-1]
-                                content_details["schema"] = openapi_spec.get("components", {}).get("schemas", {}).get(schema_name, {})
-
-                    endpoint_info = {
-                        "path": path,
-                        "method": method.upper(),
-                        "summary": details.get("summary", ""),
-                        "description": details.get("description", ""),
-                        "parameters": details.get("parameters", []),
-                        "path_params": path_params,
-                        "query_params": query_params,
-                        "requestBody": details.get("requestBody", {}),
-                        "responses": details.get("responses", {}),
-                        "security": details.get("security", []),
-                        "fullPath": f"{method.upper()} {path}",
-                    }
-                    endpoints_by_tag[tag].append(endpoint_info)
-
-    return endpoints_by_tag
+            if method.lower() not in HTTP_METHODS:
+                continue
+
+            method = method.upper()
+            key = f"{method} {path}"
+            if key in reusable:
+                endpoints.append(reusable[key])
+                continue
+
+            parameters = _merge_parameters(path_parameters, resolver.resolve(details.get("parameters", [])))
+            endpoints.append(Endpoint(
+                key=key,
+                path=path,
+                method=method,
+                operation_id=details.get("operationId"),
+                summary=details.get("summary", ""),
+                description=details.get("description", ""),
+                tags=tuple(details.get("tags") or ["default"]),
+                parameters=parameters,
+                path_params=tuple(p for p in parameters if p.get("in") == "path"),
+                query_params=tuple(p for p in parameters if p.get("in") == "query"),
+                request_body=resolver.resolve(details.get("requestBody", {})),
+                responses=resolver.resolve(details.get("responses", {})),
+                security=tuple(details.get("security", [])),
+                url_builder=UrlBuilder(path, parameters),
+            ))
+
+    index = EndpointIndex(endpoints, spec_hash=spec_hash, resolver=resolver)
+    index.fingerprints = fingerprints
+    return index
+
+
+def download_endpoint_index(service, base_url):
+    entry, _ = load_spec_source(spec_location(service, base_url))
+    return process_openapi_spec(entry.spec, spec_hash=entry.spec_hash)
+
+
+@st.cache_resource(max_entries=64)
+def get_endpoint_index(spec_hash, _openapi_spec, _previous=None):
+    return process_openapi_spec(_openapi_spec, spec_hash=spec_hash, previous=_previous)
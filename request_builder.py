@@ -0,0 +1,202 @@
+import json
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+PATH_TEMPLATE = re.compile(r"\{([^{}]+)\}")
+UNRESERVED = re.compile(r"[A-Za-z0-9_.~-]*")
+ASCII_ESCAPES = {i: f"%{i:02X}" for i in range(128) if not UNRESERVED.fullmatch(chr(i))}
+QUERY_DELIMITERS = {"form": ",", "spaceDelimited": "%20", "pipeDelimited": "|"}
+
+
+def _quote(value):
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if type(value) is int:
+        return str(value)
+    text = value if type(value) is str else str(value)
+    return text if UNRESERVED.fullmatch(text) else _escape(text)
+
+
+@lru_cache(maxsize=16384)
+def _escape(text):
+    return text.translate(ASCII_ESCAPES) if text.isascii() else quote(text, safe="")
+
+
+def serialize_path_value(style, explode, name, value):
+    if isinstance(value, (list, tuple)):
+        items = [_quote(v) for v in value]
+    elif isinstance(value, dict):
+        if explode:
+            items = [f"{_quote(k)}={_quote(v)}" for k, v in value.items()]
+        else:
+            items = [part for k, v in value.items() for part in (_quote(k), _quote(v))]
+    else:
+        value = _quote(value)
+        if style == "label":
+            return f".{value}"
+        if style == "matrix":
+            return f";{name}={value}"
+        return value
+
+    if style == "label":
+        return "." + ("." if explode else ",").join(items)
+    if style == "matrix":
+        if not explode:
+            return f";{name}=" + ",".join(items)
+        if isinstance(value, dict):
+            return ";" + ";".join(items)
+        return "".join(f";{name}={item}" for item in items)
+    return ",".join(items)
+
+
+def serialize_query_value(style, explode, name, value, parts):
+    if isinstance(value, (list, tuple)):
+        items = [_quote(v) for v in value]
+        if explode and style == "form":
+            parts.extend(f"{name}={item}" for item in items)
+        else:
+            parts.append(f"{name}=" + QUERY_DELIMITERS.get(style, ",").join(items))
+    elif isinstance(value, dict):
+        if style == "deepObject":
+            parts.extend(f"{name}[{_quote(k)}]={_quote(v)}" for k, v in value.items())
+        elif explode:
+            parts.extend(f"{_quote(k)}={_quote(v)}" for k, v in value.items())
+        else:
+            parts.append(f"{name}=" + ",".join(part for k, v in value.items() for part in (_quote(k), _quote(v))))
+    else:
+        parts.append(f"{name}={_quote(value)}")
+
+
+def _style(parameter, default_style):
+    style = parameter.get("style", default_style)
+    explode = parameter.get("explode", style == "form")
+    is_array = (parameter.get("schema") or {}).get("type") == "array"
+    return style, explode, is_array
+
+
+class UrlBuilder:
+    __slots__ = ("template", "parameters", "segments", "path_styles", "query_styles")
+
+    def __init__(self, path_template, parameters=()):
+        self.template = path_template
+        self.parameters = parameters
+        self.segments = None
+
+    def _compile(self):
+        parameters, path_template = self.parameters, self.template
+        self.path_styles = {p["name"]: _style(p, "simple") for p in parameters if p.get("in") == "path"}
+        self.query_styles = {
+            p["name"]: (quote(str(p["name"]), safe=""), *_style(p, "form")) for p in parameters if p.get("in") == "query"
+        }
+
+        segments = []
+        position = 0
+        for match in PATH_TEMPLATE.finditer(path_template):
+            segments.append((path_template[position:match.start()], match.group(1)))
+            position = match.end()
+        segments.append((path_template[position:], None))
+        self.segments = tuple(segments)
+
+    def build_path(self, path_params):
+        if self.segments is None:
+            self._compile()
+        parts = []
+        for literal, name in self.segments:
+            parts.append(literal)
+            if name is None:
+                continue
+            value = path_params.get(name)
+            if value is None:
+                parts.append(f"{{{name}}}")
+                continue
+            style, explode, is_array = self.path_styles.get(name, ("simple", False, False))
+            if is_array and isinstance(value, str):
+                value = [item.strip() for item in value.split(",")]
+            if style == "simple" and not isinstance(value, (list, tuple, dict)):
+                parts.append(_quote(value))
+            else:
+                parts.append(serialize_path_value(style, explode, name, value))
+        return "".join(parts)
+
+    def build_query(self, query_params):
+        if self.segments is None:
+            self._compile()
+        parts = []
+        for name, value in query_params.items():
+            if value is None or value == "":
+                continue
+            encoded_name, style, explode, is_array = self.query_styles.get(name) or (_quote(name), "form", True, False)
+            if is_array and isinstance(value, str):
+                value = [item.strip() for item in value.split(",")]
+            if style == "form" and not isinstance(value, (list, tuple, dict)):
+                parts.append(f"{encoded_name}={_quote(value)}")
+            else:
+                serialize_query_value(style, explode, encoded_name, value, parts)
+        return "&".join(parts)
+
+    def build(self, path_params, query_params):
+        path = self.build_path(path_params)
+        query = self.build_query(query_params) if query_params else ""
+        return f"{path}?{query}" if query else path
+
+
+@lru_cache(maxsize=4096)
+def url_builder(path_template):
+    return UrlBuilder(path_template)
+
+
+def build_full_url(path_template, path_params, query_params):
+    return url_builder(path_template).build(path_params, query_params)
+
+
+def build_headers(custom_headers, partition_id):
+    headers = {'Accept': 'application/json'}
+    headers.update(custom_headers or {})
+    headers["data-partition-id"] = partition_id
+    return headers
+
+
+def prepare_request_body(body_params, endpoint):
+    if not body_params:
+        return {}
+
+    json_data = {}
+    for param_name, param_value in body_params.items():
+        if param_value is not None and param_value != "":
+            json_data[param_name] = process_param_value(param_name, param_value, endpoint)
+    return json_data
+
+
+def process_param_value(param_name, param_value, endpoint):
+    request_body = endpoint.request_body
+    content = request_body.get('content', {}).get('application/json', {})
+    schema = content.get('schema', {})
+    properties = schema.get('properties', {})
+    return coerce_value(properties.get(param_name, {}).get('type', 'string'), param_value)
+
+
+def coerce_value(prop_type, param_value):
+    if prop_type == 'array' and isinstance(param_value, str):
+        return [item.strip() for item in param_value.split(',')]
+    elif prop_type == 'object' and isinstance(param_value, str):
+        try:
+            return json.loads(param_value)
+        except json.JSONDecodeError:
+            return param_value
+    elif prop_type == 'number':
+        try:
+            return float(param_value)
+        except (TypeError, ValueError):
+            return param_value
+    elif prop_type == 'integer':
+        try:
+            return int(param_value)
+        except (TypeError, ValueError):
+            return param_value
+    elif prop_type == 'boolean' and isinstance(param_value, str):
+        return param_value.lower() in ('true', 'yes', '1', 'y')
+
+    return param_value
@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from http_client import send_request
+from instrumentation import track_request
+from response_streaming import DOWNLOAD_LIMIT, RequestCancelled, consume_response, is_line_stream
+from schema_validation import validate_response
+
+DEFAULT_WORKERS = 16
+LIVE_LINES = 200
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PreparedRequest:
+    service: str
+    endpoint_key: str
+    method: str
+    url: str
+    headers: dict
+    json_data: object = None
+    responses: dict = None
+    gate: object = None
+
+
+class RequestHandle:
+    def __init__(self, request):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.submitted_at = time.time()
+        self.started = False
+        self.future = None
+        self.cancel_event = threading.Event()
+        self.live_lines = deque(maxlen=LIVE_LINES)
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    @property
+    def state(self):
+        if self.future.cancelled() or (self.future.done() and isinstance(self.future.exception(), RequestCancelled)):
+            return "cancelled"
+        if self.future.done():
+            return "failed" if self.future.exception() is not None else "done"
+        if self.cancel_event.is_set():
+            return "cancelling"
+        return "running" if self.started else "queued"
+
+    def result(self):
+        return self.future.result() if self.state == "done" else None
+
+    def error(self):
+        if self.state != "failed":
+            return None
+        return self.future.exception()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.future.cancel()
+
+    def close(self):
+        self.cancel()
+        # Runs now if the request has finished, or when it does, so a response
+        # that arrives after close() does not leave its spooled body behind.
+        self.future.add_done_callback(self._close_body)
+
+    def _close_body(self, future):
+        result = self.result()
+        if result is not None:
+            result.body.close()
+
+
+def run_request(session, handle, metrics_store=None, history_store=None):
+    handle.started = True
+    request = handle.request
+    if handle.cancel_event.is_set():
+        raise RequestCancelled()
+
+    with track_request() as timing:
+        response = send_request(session, request.method, request.url, request.headers, request.json_data, stream=True,
+                                gate=request.gate, cancel_event=handle.cancel_event)
+        on_line = handle.live_lines.append if is_line_stream(response.headers.get("Content-Type", "")) else None
+        result = consume_response(response, on_line=on_line, cancel_event=handle.cancel_event)
+    timing.finish(result.body.size)
+    result.elapsed_s = timing.total_ms / 1000
+    result.timing = timing
+    try:
+        result.schema_errors = check_schema(request, result)
+    except Exception:
+        # A validator problem must not cost the caller a response that arrived.
+        logger.exception("Could not validate the response of %s %s", request.method, request.url)
+
+    if metrics_store is not None:
+        metrics_store.record(request.service, request.endpoint_key, request.method, result.status_code, timing)
+    if history_store is not None:
+        # The response is still good when history cannot be written.
+        try:
+            result.history_id = history_store.record(request, result)
+        except Exception:
+            logger.exception("Could not record %s %s in history", request.method, request.url)
+    return result
+
+
+def check_schema(request, result):
+    if not request.responses or "json" not in result.content_type or not 0 < result.body.size <= DOWNLOAD_LIMIT:
+        return None
+    try:
+        payload = result.body.json(limit=DOWNLOAD_LIMIT)
+    except ValueError as e:
+        return [("$", f"response body is not valid JSON: {e}")]
+    return validate_response(request.responses, result.status_code, payload, result.content_type)
+
+
+class RequestExecutor:
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="request")
+
+    def submit(self, session, request, metrics_store=None, history_store=None):
+        handle = RequestHandle(request)
+        handle.future = self._pool.submit(run_request, session, handle, metrics_store, history_store)
+        return handle
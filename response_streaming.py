@@ -0,0 +1,118 @@
+import json
+import re
+import tempfile
+from dataclasses import dataclass
+
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MEMORY_LIMIT = 8 * 1024 * 1024
+PAGE_BYTES = 256 * 1024
+JSON_RENDER_LIMIT = 2 * 1024 * 1024
+DOWNLOAD_LIMIT = 64 * 1024 * 1024
+# orjson turns integers outside the 64-bit range into floats; bodies that may
+# contain one are parsed with json, which keeps them exact.
+WIDE_INTEGER = re.compile(rb"\d{19}")
+LINE_STREAM_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/jsonlines", "text/event-stream")
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class SpooledBody:
+    def __init__(self):
+        self.file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT)
+        self.size = 0
+
+    @property
+    def on_disk(self):
+        return getattr(self.file, "_rolled", False)
+
+    def write(self, chunk):
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def read_range(self, offset, length):
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def read_all(self):
+        return self.read_range(0, self.size)
+
+    def page_count(self, page_bytes=PAGE_BYTES):
+        return max(1, -(-self.size // page_bytes))
+
+    def text_page(self, page, page_bytes=PAGE_BYTES):
+        return self.read_range(page * page_bytes, page_bytes).decode("utf-8", errors="replace")
+
+    def json(self, limit=JSON_RENDER_LIMIT):
+        if self.size > limit:
+            raise ValueError(f"Body of {self.size} bytes exceeds the {limit} byte JSON rendering limit")
+        data = self.read_all()
+        if orjson is not None and not WIDE_INTEGER.search(data):
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # Fall through for what json accepts and orjson does not, like NaN.
+                pass
+        return json.loads(data)
+
+    def close(self):
+        self.file.close()
+
+
+@dataclass
+class StreamedResponse:
+    status_code: int
+    reason: str
+    url: str
+    headers: dict
+    body: SpooledBody
+    elapsed_s: float = 0.0
+    timing: object = None
+    schema_errors: list = None
+    history_id: int = None
+
+    @property
+    def content_type(self):
+        return self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+
+def is_line_stream(content_type):
+    return content_type.split(";")[0].strip().lower() in LINE_STREAM_CONTENT_TYPES
+
+
+def consume_response(response, on_line=None, cancel_event=None):
+    body = SpooledBody()
+    pending = b""
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if cancel_event is not None and cancel_event.is_set():
+                raise RequestCancelled()
+            body.write(chunk)
+            if on_line is not None:
+                *lines, pending = (pending + chunk).split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        on_line(line.decode("utf-8", errors="replace"))
+        if on_line is not None and pending.strip():
+            on_line(pending.decode("utf-8", errors="replace"))
+    except BaseException:
+        body.close()
+        raise
+    finally:
+        response.close()
+
+    return StreamedResponse(
+        status_code=response.status_code,
+        reason=response.reason,
+        url=response.url,
+        headers=CaseInsensitiveDict(response.headers),
+        body=body,
+    )
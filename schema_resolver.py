@@ -0,0 +1,110 @@
+from urllib.parse import unquote
+
+LITERAL_KEYS = ("example", "default", "enum", "const")
+
+
+def decode_pointer(pointer):
+    if pointer.startswith("#"):
+        pointer = pointer[1:]
+    if not pointer:
+        return []
+    return [unquote(part).replace("~1", "/").replace("~0", "~") for part in pointer.lstrip("/").split("/")]
+
+
+class SchemaResolver:
+    def __init__(self, spec):
+        self.spec = spec or {}
+        self._resolved = {}
+        # Refs whose placeholder is still being filled, with the sibling-merged
+        # copies that have to pick up its keys once it is.
+        self._deferred = {}
+
+    def lookup(self, ref):
+        node = self.spec
+        for part in decode_pointer(ref):
+            if isinstance(node, list):
+                try:
+                    node = node[int(part)]
+                except (ValueError, IndexError):
+                    return None
+            elif isinstance(node, dict):
+                if part not in node:
+                    return None
+                node = node[part]
+            else:
+                return None
+        return node
+
+    def resolve_ref(self, ref):
+        if ref in self._resolved:
+            return self._resolved[ref]
+
+        # Register a placeholder before descending so self-referencing schemas
+        # pick up the same object and cycles are closed once it is filled in.
+        placeholder = {}
+        self._resolved[ref] = placeholder
+        self._deferred[ref] = []
+        target = self.lookup(ref)
+        resolved = self.resolve(target) if target is not None else {}
+        deferred = self._deferred.pop(ref)
+        if isinstance(resolved, dict):
+            if resolved is not placeholder:
+                placeholder.update(resolved)
+            for merged in deferred:
+                for key, value in placeholder.items():
+                    merged.setdefault(key, value)
+            return placeholder
+        self._resolved[ref] = resolved
+        return resolved
+
+    def resolve(self, node):
+        if isinstance(node, list):
+            return [self.resolve(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+
+        if "$ref" in node and isinstance(node["$ref"], str):
+            ref = node["$ref"]
+            target = self.resolve_ref(ref)
+            siblings = {k: v for k, v in node.items() if k != "$ref"}
+            if not siblings or not isinstance(target, dict):
+                return target
+            merged = {**target, **self._resolve_items(siblings)}
+            if ref in self._deferred:
+                self._deferred[ref].append(merged)
+            return merged
+
+        resolved = self._resolve_items(node)
+        if "allOf" in resolved:
+            resolved = merge_all_of(resolved)
+        return resolved
+
+    def _resolve_items(self, node):
+        return {
+            key: value if key in LITERAL_KEYS else self.resolve(value)
+            for key, value in node.items()
+        }
+
+
+def merge_all_of(schema):
+    merged = {k: v for k, v in schema.items() if k != "allOf"}
+    properties = dict(merged.get("properties", {}))
+    required = list(merged.get("required", []))
+
+    for part in schema["allOf"]:
+        if not isinstance(part, dict):
+            continue
+        properties.update(part.get("properties", {}))
+        for name in part.get("required", []):
+            if name not in required:
+                required.append(name)
+        for key, value in part.items():
+            if key not in ("properties", "required"):
+                merged.setdefault(key, value)
+
+    if properties:
+        merged["properties"] = properties
+        merged.setdefault("type", "object")
+    if required:
+        merged["required"] = required
+    return merged
@@ -0,0 +1,297 @@
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+MAX_COMPILED_VALIDATORS = 10_000
+
+logger = logging.getLogger(__name__)
+
+TYPE_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool)) or (isinstance(v, float) and v.is_integer()),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+    "null": lambda v: v is None,
+}
+
+
+def format_path(path):
+    parts = []
+    while path is not None:
+        path, key = path
+        parts.append(f"[{key}]" if isinstance(key, int) else f".{key}")
+    return "$" + "".join(reversed(parts))
+
+
+def _accept(data, path, errors):
+    pass
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _compile_pattern(pattern):
+    # Specs use ECMA-262 patterns; ones Python's re cannot compile (\p{L}, ...)
+    # are skipped, and the warning is logged once because validators are cached.
+    try:
+        return re.compile(pattern)
+    except (re.error, TypeError) as e:
+        logger.warning("Skipping schema pattern %r that cannot be compiled: %s", pattern, e)
+        return None
+
+
+def _is_multiple(value, multiple):
+    if isinstance(value, int) and isinstance(multiple, int):
+        return value % multiple == 0
+    # Binary floats make 0.3 / 0.1 inexact; compare the decimal text instead.
+    try:
+        return Decimal(str(value)) % Decimal(str(multiple)) == 0
+    except (InvalidOperation, ValueError):
+        return True
+
+
+class ValidatorCache:
+    def __init__(self, max_entries=MAX_COMPILED_VALIDATORS):
+        self.max_entries = max_entries
+        self._compiled = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, schema):
+        if not isinstance(schema, dict) or not schema:
+            return _accept
+
+        key = id(schema)
+        with self._lock:
+            entry = self._compiled.get(key)
+            if entry is not None and entry[0] is schema:
+                self._compiled.move_to_end(key)
+                return entry[1]
+
+            # Recursive schemas reach themselves while compiling; hand out a
+            # trampoline that forwards to the finished validator.
+            compiled = []
+            self._compiled[key] = (schema, lambda data, path, errors: compiled[0](data, path, errors))
+            validator = self._compile(schema)
+            compiled.append(validator)
+            self._compiled[key] = (schema, validator)
+            while len(self._compiled) > self.max_entries:
+                self._compiled.popitem(last=False)
+            return validator
+
+    def _compile(self, schema):
+        checks = []
+        nullable = bool(schema.get("nullable"))
+
+        type_check = None
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            predicates = [TYPE_CHECKS[t] for t in types if t in TYPE_CHECKS]
+            expected = " or ".join(types)
+            if len(predicates) == 1:
+                type_check = predicates[0]
+            elif predicates:
+                type_check = lambda v: any(p(v) for p in predicates)
+
+        if "enum" in schema:
+            enum = schema["enum"]
+
+            def check_enum(data, path, errors):
+                if data not in enum:
+                    errors.append((format_path(path), f"{data!r} is not one of {enum}"))
+            checks.append(check_enum)
+
+        if "const" in schema:
+            const = schema["const"]
+
+            def check_const(data, path, errors):
+                if data != const:
+                    errors.append((format_path(path), f"expected {const!r}"))
+            checks.append(check_const)
+
+        number_check = self._compile_number(schema)
+        if number_check is not None:
+            checks.append(number_check)
+        string_check = self._compile_string(schema)
+        if string_check is not None:
+            checks.append(string_check)
+        array_check = self._compile_array(schema)
+        if array_check is not None:
+            checks.append(array_check)
+        object_check = self._compile_object(schema)
+        if object_check is not None:
+            checks.append(object_check)
+        checks.extend(self._compile_combinators(schema))
+
+        def validator(data, path, errors):
+            if data is None and nullable:
+                return
+            if type_check is not None and not type_check(data):
+                errors.append((format_path(path), f"expected {expected}, got {type(data).__name__}"))
+                return
+            for check in checks:
+                check(data, path, errors)
+
+        return validator
+
+    def _compile_number(self, schema):
+        minimum, maximum = schema.get("minimum"), schema.get("maximum")
+        exclusive_min, exclusive_max = schema.get("exclusiveMinimum"), schema.get("exclusiveMaximum")
+        if isinstance(exclusive_min, bool):
+            minimum, exclusive_min = (None, minimum) if exclusive_min else (minimum, None)
+        if isinstance(exclusive_max, bool):
+            maximum, exclusive_max = (None, maximum) if exclusive_max else (maximum, None)
+        multiple = schema.get("multipleOf")
+        if minimum is None and maximum is None and exclusive_min is None and exclusive_max is None and not multiple:
+            return None
+
+        def check_number(data, path, errors):
+            if not _is_number(data):
+                return
+            if minimum is not None and data < minimum:
+                errors.append((format_path(path), f"less than minimum {minimum}"))
+            if maximum is not None and data > maximum:
+                errors.append((format_path(path), f"greater than maximum {maximum}"))
+            if exclusive_min is not None and data <= exclusive_min:
+                errors.append((format_path(path), f"not greater than {exclusive_min}"))
+            if exclusive_max is not None and data >= exclusive_max:
+                errors.append((format_path(path), f"not less than {exclusive_max}"))
+            if multiple and not _is_multiple(data, multiple):
+                errors.append((format_path(path), f"not a multiple of {multiple}"))
+        return check_number
+
+    def _compile_string(self, schema):
+        min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+        pattern = _compile_pattern(schema["pattern"]) if "pattern" in schema else None
+        if min_length is None and max_length is None and pattern is None:
+            return None
+
+        def check_string(data, path, errors):
+            if not isinstance(data, str):
+                return
+            if min_length is not None and len(data) < min_length:
+                errors.append((format_path(path), f"shorter than {min_length} characters"))
+            if max_length is not None and len(data) > max_length:
+                errors.append((format_path(path), f"longer than {max_length} characters"))
+            if pattern is not None and not pattern.search(data):
+                errors.append((format_path(path), f"does not match pattern {pattern.pattern!r}"))
+        return check_string
+
+    def _compile_array(self, schema):
+        min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+        unique = schema.get("uniqueItems")
+        items = self.get(schema["items"]) if isinstance(schema.get("items"), dict) and schema["items"] else None
+        if min_items is None and max_items is None and not unique and items is None:
+            return None
+
+        def check_array(data, path, errors):
+            if not isinstance(data, list):
+                return
+            if min_items is not None and len(data) < min_items:
+                errors.append((format_path(path), f"fewer than {min_items} items"))
+            if max_items is not None and len(data) > max_items:
+                errors.append((format_path(path), f"more than {max_items} items"))
+            if unique and len({json.dumps(item, sort_keys=True) for item in data}) != len(data):
+                errors.append((format_path(path), "items are not unique"))
+            if items is not None:
+                for i, item in enumerate(data):
+                    items(item, (path, i), errors)
+        return check_array
+
+    def _compile_object(self, schema):
+        properties = {name: self.get(prop) for name, prop in schema.get("properties", {}).items()}
+        required = tuple(schema.get("required", ()))
+        additional = schema.get("additionalProperties", True)
+        additional_validator = self.get(additional) if isinstance(additional, dict) and additional else None
+        forbid_additional = additional is False
+        if not properties and not required and additional_validator is None and not forbid_additional:
+            return None
+
+        def check_object(data, path, errors):
+            if not isinstance(data, dict):
+                return
+            for name in required:
+                if name not in data:
+                    errors.append((format_path((path, name)), "required property is missing"))
+            for name, value in data.items():
+                validator = properties.get(name)
+                if validator is not None:
+                    validator(value, (path, name), errors)
+                elif forbid_additional:
+                    errors.append((format_path((path, name)), "additional property is not allowed"))
+                elif additional_validator is not None:
+                    additional_validator(value, (path, name), errors)
+        return check_object
+
+    def _compile_combinators(self, schema):
+        checks = []
+        for sub_schema in schema.get("allOf", ()):
+            checks.append(self.get(sub_schema))
+
+        if schema.get("anyOf"):
+            any_of = [self.get(s) for s in schema["anyOf"]]
+
+            def check_any_of(data, path, errors):
+                if not any(_passes(v, data) for v in any_of):
+                    errors.append((format_path(path), "does not match any schema in anyOf"))
+            checks.append(check_any_of)
+
+        if schema.get("oneOf"):
+            one_of = [self.get(s) for s in schema["oneOf"]]
+
+            def check_one_of(data, path, errors):
+                matches = sum(1 for v in one_of if _passes(v, data))
+                if matches != 1:
+                    errors.append((format_path(path), f"matches {matches} schemas in oneOf, expected exactly 1"))
+            checks.append(check_one_of)
+
+        if isinstance(schema.get("not"), dict):
+            negated = self.get(schema["not"])
+
+            def check_not(data, path, errors):
+                if _passes(negated, data):
+                    errors.append((format_path(path), "matches a schema it must not match"))
+            checks.append(check_not)
+        return checks
+
+
+def _passes(validator, data):
+    errors = []
+    validator(data, None, errors)
+    return not errors
+
+
+validators = ValidatorCache()
+
+
+def validate(schema, data):
+    errors = []
+    validators.get(schema)(data, None, errors)
+    return errors
+
+
+def response_schema(responses, status_code, content_type="application/json"):
+    response = responses.get(str(status_code)) or responses.get(f"{str(status_code)[0]}XX") or responses.get("default")
+    if response is None:
+        return None, False
+    content = response.get("content", {})
+    media = content.get(content_type) or next(
+        (details for media_type, details in content.items() if "json" in media_type), None
+    )
+    return (media or {}).get("schema"), True
+
+
+def validate_response(responses, status_code, payload, content_type="application/json"):
+    if not responses:
+        return None
+    schema, declared = response_schema(responses, status_code, content_type)
+    if not declared:
+        return [("$", f"status {status_code} is not declared in the endpoint's responses")]
+    if not schema:
+        return None
+    return validate(schema, payload)
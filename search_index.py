@@ -0,0 +1,153 @@
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+
+TOKEN_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+FIELD_WEIGHTS = {
+    "path": 3.0,
+    "operation_id": 3.0,
+    "method": 2.0,
+    "tag": 2.0,
+    "summary": 2.0,
+    "parameter": 1.5,
+    "description": 1.0,
+}
+PREFIX_FACTOR = 0.7
+FUZZY_FACTOR = 0.4
+MAX_EXPANSIONS = 64
+MIN_FUZZY_LENGTH = 4
+TOKEN_CACHE_SIZE = 256
+DEFAULT_LIMIT = 25
+
+
+@dataclass(frozen=True, slots=True)
+class SearchHit:
+    score: float
+    service: str
+    endpoint: object
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_PATTERN.findall(text or "")]
+
+
+def _deletions(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def endpoint_fields(endpoint):
+    yield "method", endpoint.method
+    yield "path", endpoint.path
+    yield "operation_id", endpoint.operation_id
+    yield "summary", endpoint.summary
+    yield "description", endpoint.description
+    for tag in endpoint.tags:
+        yield "tag", tag
+    for parameter in endpoint.parameters:
+        yield "parameter", parameter.get("name")
+
+
+class SearchIndex:
+    def __init__(self, endpoint_index, service=None):
+        self.service = service
+        # Document ids follow the tie-break order (shorter keys first), so the
+        # smallest ids within a score level are the best hits.
+        self.endpoints = tuple(sorted(endpoint_index, key=lambda endpoint: (len(endpoint.key), endpoint.key)))
+        postings = {}
+        for doc_id, endpoint in enumerate(self.endpoints):
+            best = {}
+            for field_name, text in endpoint_fields(endpoint):
+                weight = FIELD_WEIGHTS[field_name]
+                for token in tokenize(text):
+                    if best.get(token, 0) < weight:
+                        best[token] = weight
+            for token, weight in best.items():
+                postings.setdefault(token, {}).setdefault(weight, []).append(doc_id)
+
+        self.postings = {
+            term: {weight: frozenset(docs) for weight, docs in by_weight.items()} for term, by_weight in postings.items()
+        }
+        self.vocabulary = sorted(self.postings)
+        self._token_cache = {}
+        self.deletions = {}
+        for term in self.vocabulary:
+            if len(term) >= MIN_FUZZY_LENGTH:
+                for variant in _deletions(term):
+                    self.deletions.setdefault(variant, []).append(term)
+
+    def _expand(self, token):
+        # Maps each vocabulary term the query token can stand for to a match factor.
+        matches = {}
+        start = bisect_left(self.vocabulary, token)
+        for term in self.vocabulary[start:start + MAX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            matches[term] = 1.0 if term == token else PREFIX_FACTOR * len(token) / len(term)
+
+        if len(token) >= MIN_FUZZY_LENGTH:
+            candidates = set(self.deletions.get(token, ()))
+            for variant in _deletions(token):
+                if variant in self.postings:
+                    candidates.add(variant)
+                candidates.update(self.deletions.get(variant, ()))
+            for term in candidates:
+                matches.setdefault(term, FUZZY_FACTOR)
+        return matches
+
+    def _token_levels(self, token):
+        # Queries are typed a character at a time, so earlier tokens repeat.
+        cached = self._token_cache.get(token)
+        if cached is None:
+            if len(self._token_cache) >= TOKEN_CACHE_SIZE:
+                self._token_cache.clear()
+            cached = self._token_cache[token] = self._build_token_levels(token)
+        return cached
+
+    def _build_token_levels(self, token):
+        levels = {}
+        for term, factor in self._expand(token).items():
+            for weight, docs in self.postings[term].items():
+                levels.setdefault(weight * factor, []).append(docs)
+
+        # Each document keeps only its best score for the token.
+        result, covered = [], set()
+        for score in sorted(levels, reverse=True):
+            docs = set().union(*levels[score])
+            docs -= covered
+            if docs:
+                result.append((score, docs))
+                covered |= docs
+        return result
+
+    def score_levels(self, query):
+        combined = None
+        for token in tokenize(query):
+            levels = self._token_levels(token)
+            if combined is None:
+                combined = levels
+                continue
+            merged = {}
+            for score, docs in combined:
+                for token_score, token_docs in levels:
+                    both = docs & token_docs
+                    if both:
+                        merged.setdefault(score + token_score, set()).update(both)
+            combined = sorted(merged.items(), key=lambda item: -item[0])
+            if not combined:
+                break
+        return combined or []
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        hits = []
+        for score, docs in self.score_levels(query):
+            for doc_id in sorted(docs)[:limit - len(hits)]:
+                hits.append(SearchHit(score, self.service, self.endpoints[doc_id]))
+            if len(hits) >= limit:
+                break
+        return hits
+
+
+def search_all(indexes, query, limit=DEFAULT_LIMIT):
+    hits = [hit for index in indexes for hit in index.search(query, limit)]
+    hits.sort(key=lambda hit: (-hit.score, hit.service or "", len(hit.endpoint.key)))
+    return hits[:limit]
@@ -0,0 +1,260 @@
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, fields
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from http_client import origin
+from response_streaming import RequestCancelled
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+SLOT_POLL_S = 0.1
+
+
+class ThrottledError(requests.RequestException):
+    pass
+
+
+class CircuitOpenError(requests.RequestException):
+    pass
+
+
+@dataclass(frozen=True)
+class ServicePolicy:
+    rate_limit: float = 0.0
+    burst: int = 0
+    max_in_flight: int = 0
+    max_wait_s: float = 30.0
+    max_retries: int = 0
+    backoff_s: float = 0.2
+    max_backoff_s: float = 10.0
+    max_retry_after_s: float = 60.0
+    retry_statuses: tuple = (429, 503)
+    breaker_threshold: int = 0
+    breaker_reset_s: float = 30.0
+
+    @classmethod
+    def from_config(cls, config):
+        if not config:
+            return cls()
+        unknown = set(config) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown policy settings: {', '.join(sorted(unknown))}")
+        values = dict(config)
+        if "retry_statuses" in values:
+            values["retry_statuses"] = tuple(values["retry_statuses"])
+        return cls(**values)
+
+    @property
+    def enabled(self):
+        return bool(self.rate_limit or self.max_in_flight or self.max_retries or self.breaker_threshold)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        # Takes a token even when the bucket is empty and returns how long the
+        # caller has to wait for it, so waiters queue up in order without polling.
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self):
+        with self._lock:
+            self.tokens += 1
+
+
+class CircuitBreaker:
+    def __init__(self, threshold, reset_s):
+        self.threshold = threshold
+        self.reset_s = reset_s
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.reset_s else "half-open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_s or self._trial:
+                return False
+            # Half-open: one trial request decides whether the breaker closes.
+            self._trial = True
+            return True
+
+    def record(self, success):
+        with self._lock:
+            if success:
+                self.failures, self.opened_at, self._trial = 0, None, False
+                return False
+            self.failures += 1
+            if self._trial or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at, self._trial = time.monotonic(), False
+                return True
+            return False
+
+
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class PolicyGate:
+    def __init__(self, policy):
+        self.policy = policy
+        self.bucket = TokenBucket(policy.rate_limit, policy.burst or max(1, int(policy.rate_limit))) \
+            if policy.rate_limit else None
+        self.slots = threading.Semaphore(policy.max_in_flight) if policy.max_in_flight else None
+        self.breaker = CircuitBreaker(policy.breaker_threshold, policy.breaker_reset_s) \
+            if policy.breaker_threshold else None
+        self.counters = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _wait(self, delay, cancel_event):
+        if cancel_event is None:
+            time.sleep(delay)
+            return False
+        return cancel_event.wait(delay)
+
+    def _admit(self, cancel_event):
+        if self.bucket is not None:
+            delay = self.bucket.reserve()
+            if delay > self.policy.max_wait_s:
+                self.bucket.refund()
+                self._count("rejected")
+                raise ThrottledError(f"Rate limit would delay the request by {delay:.1f} s")
+            if delay > 0:
+                self._count("throttled")
+                if self._wait(delay, cancel_event):
+                    raise RequestCancelled()
+
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            self._count("throttled")
+            self._acquire_slot(cancel_event)
+
+        if self.breaker is not None and not self.breaker.allow():
+            if self.slots is not None:
+                self.slots.release()
+            self._count("rejected")
+            raise CircuitOpenError("Circuit breaker is open after repeated failures")
+
+    def _acquire_slot(self, cancel_event):
+        # Waits in short slices so a cancelled request stops queueing for a slot.
+        deadline = time.monotonic() + self.policy.max_wait_s
+        while not self.slots.acquire(timeout=min(SLOT_POLL_S, max(0.0, deadline - time.monotonic()))):
+            if cancel_event is not None and cancel_event.is_set():
+                raise RequestCancelled()
+            if time.monotonic() >= deadline:
+                self._count("rejected")
+                raise ThrottledError(f"{self.policy.max_in_flight} requests already in flight")
+
+    def _finish(self, success):
+        if self.slots is not None:
+            self.slots.release()
+        if self.breaker is not None and self.breaker.record(success):
+            self._count("breaker_opened")
+
+    def backoff(self, attempt):
+        # Full jitter: spreads retries from many clients over the whole window.
+        return self._rng.uniform(0, min(self.policy.max_backoff_s, self.policy.backoff_s * 2 ** attempt))
+
+    def send(self, method, send_once, cancel_event=None):
+        policy = self.policy
+        self._count("requests")
+        attempt = 0
+        while True:
+            self._admit(cancel_event)
+            self._count("attempts")
+            try:
+                response = send_once()
+            except (requests.ConnectionError, requests.Timeout):
+                self._finish(False)
+                if attempt >= policy.max_retries or method not in IDEMPOTENT_METHODS:
+                    raise
+                delay = self.backoff(attempt)
+            except Exception:
+                self._finish(False)
+                raise
+            else:
+                self._finish(response.status_code < 500)
+                # A 429 means the request was not processed; other statuses may
+                # follow a partial write, so only idempotent methods replay them.
+                retryable = response.status_code in policy.retry_statuses and (
+                    response.status_code == 429 or method in IDEMPOTENT_METHODS)
+                if not retryable or attempt >= policy.max_retries:
+                    return response
+                delay = retry_after_seconds(response)
+                if delay is None:
+                    delay = self.backoff(attempt)
+                elif delay > policy.max_retry_after_s:
+                    return response
+                else:
+                    self._count("retry_after")
+                response.close()
+
+            attempt += 1
+            self._count("retried")
+            if self._wait(delay, cancel_event):
+                raise RequestCancelled()
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+        counters["breaker"] = self.breaker.state if self.breaker is not None else "disabled"
+        return counters
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def policy_gate(service_name, policy, base_url):
+    # Each deployment of a service gets its own limits and breaker, so one
+    # failing environment does not block requests to the others.
+    if policy is None or not policy.enabled:
+        return None
+    key = (service_name, origin(base_url), policy)
+    with _gates_lock:
+        gate = _gates.get(key)
+        if gate is None:
+            gate = _gates[key] = PolicyGate(policy)
+        return gate
+
+
+def gate_snapshots():
+    with _gates_lock:
+        gates = list(_gates.items())
+    return {f"{service_name} @ {service_origin}": gate.snapshot() for (service_name, service_origin, _), gate in gates}
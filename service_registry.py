@@ -0,0 +1,43 @@
+import json
+import os
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from service_policy import ServicePolicy
+
+SERVICE_REGISTRY_PATH = os.environ.get(
+    "API_TESTER_SERVICES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "services.json")
+)
+
+
+@dataclass(frozen=True)
+class ServiceDefinition:
+    name: str
+    display_name: str
+    spec_path: str
+    spec_source: str = None
+    policy: ServicePolicy = ServicePolicy()
+
+
+def _spec_source(root, source):
+    # Local spec files are resolved relative to the registry file.
+    if not source or urlsplit(source).scheme in ("http", "https"):
+        return source
+    return os.path.join(root, os.path.expanduser(source))
+
+
+def load_service_registry(path=SERVICE_REGISTRY_PATH):
+    with open(path) as f:
+        config = json.load(f)
+
+    root = os.path.dirname(os.path.abspath(path))
+    return {
+        name: ServiceDefinition(
+            name=name,
+            display_name=details.get("display_name", name),
+            spec_path=details.get("spec_path", ""),
+            spec_source=_spec_source(root, details.get("spec_source")),
+            policy=ServicePolicy.from_config(details.get("policy")),
+        )
+        for name, details in config.get("services", {}).items()
+    }
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, field
+
+from endpoint_index import HTTP_METHODS
+from schema_resolver import SchemaResolver
+
+REF_PATTERN = re.compile(r'"\$ref": "((?:[^"\\]|\\.)*)"')
+
+
+@dataclass
+class SpecChange:
+    old_hash: str
+    new_hash: str
+    added: tuple = ()
+    removed: tuple = ()
+    changed: tuple = ()
+    detected_at: float = field(default_factory=time.time)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self):
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+
+def _canonical(node):
+    text = json.dumps(node, sort_keys=True, default=str)
+    refs = frozenset(json.loads(f'"{ref}"') if "\\" in ref else ref for ref in REF_PATTERN.findall(text))
+    return hashlib.sha1(text.encode()).hexdigest(), refs
+
+
+class _RefGraph:
+    def __init__(self, spec):
+        self.resolver = SchemaResolver(spec)
+        self._digests = {}
+        self._edges = {}
+        self._closures = {}
+
+    def _visit(self, ref):
+        if ref not in self._digests:
+            self._digests[ref], self._edges[ref] = _canonical(self.resolver.lookup(ref))
+
+    def closure_digest(self, refs):
+        if refs not in self._closures:
+            seen, pending = set(), list(refs)
+            while pending:
+                ref = pending.pop()
+                if ref in seen:
+                    continue
+                seen.add(ref)
+                self._visit(ref)
+                pending.extend(self._edges[ref] - seen)
+            self._closures[refs] = sorted(f"{ref}={self._digests[ref]}" for ref in seen)
+        return self._closures[refs]
+
+
+def operation_fingerprints(spec):
+    graph = _RefGraph(spec)
+    fingerprints = {}
+    for path, methods in (spec or {}).get("paths", {}).items():
+        methods = (graph.resolver.lookup(methods["$ref"]) or {}) if "$ref" in methods else methods
+        path_parameters = methods.get("parameters", [])
+        for method, details in methods.items():
+            if method.lower() not in HTTP_METHODS:
+                continue
+            digest, refs = _canonical({"path_parameters": path_parameters, "operation": details})
+            closure = graph.closure_digest(refs)
+            fingerprints[f"{method.upper()} {path}"] = hashlib.sha1(f"{digest}:{closure}".encode()).hexdigest()
+    return fingerprints
+
+
+def diff_fingerprints(old, new, old_hash=None, new_hash=None):
+    return SpecChange(
+        old_hash=old_hash,
+        new_hash=new_hash,
+        added=tuple(sorted(new.keys() - old.keys())),
+        removed=tuple(sorted(old.keys() - new.keys())),
+        changed=tuple(sorted(key for key in old.keys() & new.keys() if old[key] != new[key])),
+    )
+
+
+def index_fingerprints(index):
+    if index.fingerprints is None:
+        index.fingerprints = operation_fingerprints(index.resolver.spec if index.resolver else {})
+    return index.fingerprints
+
+
+def diff_indexes(old_index, new_index):
+    return diff_fingerprints(
+        index_fingerprints(old_index), index_fingerprints(new_index), old_index.spec_hash, new_index.spec_hash
+    )
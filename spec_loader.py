@@ -0,0 +1,295 @@
+import gc
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urljoin, urlsplit
+
+import yaml
+
+from http_client import get_session
+from response_streaming import WIDE_INTEGER
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SPEC_CACHE_DIR = os.environ.get(
+    "API_TESTER_SPEC_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".spec_cache")
+)
+CACHE_FORMAT = 3
+SPEC_CACHE_MAX_BYTES = int(os.environ.get("API_TESTER_SPEC_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+CACHE_SUFFIXES = (".json", ".pickle")
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+JSON_START = re.compile(rb"\s*[{\[]")
+# Only documents that may contain a $ref to another file are walked when bundling.
+EXTERNAL_REF = re.compile(rb"""\$ref['"]?\s*:(?![\s'"]*#)""")
+EXTERNAL_KEY = "x-external"
+
+
+class YamlSpecLoader(getattr(yaml, "CSafeLoader", yaml.SafeLoader)):
+    # Dates stay strings, as they would be in the JSON form of the spec.
+    yaml_implicit_resolvers = {
+        first: [(tag, pattern) for tag, pattern in resolvers if tag != "tag:yaml.org,2002:timestamp"]
+        for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
+    }
+
+
+class SpecLoadError(ValueError):
+    pass
+
+
+@dataclass
+class LoadedSpec:
+    spec: dict
+    spec_hash: str
+    # (location, sha256) of every external document bundled into the spec.
+    sources: tuple = ()
+
+
+def is_url(location):
+    return urlsplit(location).scheme in ("http", "https")
+
+
+def read_location(location, timeout=5):
+    if is_url(location):
+        response = get_session(location).get(location, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+    with open(location, "rb") as f:
+        return f.read()
+
+
+def resolve_location(base, target):
+    if is_url(base) or is_url(target):
+        return urljoin(base, target)
+    return os.path.normpath(os.path.join(os.path.dirname(base), target))
+
+
+def decompress(data, location=""):
+    if data[:2] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise SpecLoadError(f"{location or 'Spec'} is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+@contextmanager
+def gc_paused():
+    # Building a large spec allocates millions of containers; letting the cyclic
+    # collector run between them costs more than the parse itself.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _string_keys(document):
+    # Unquoted YAML keys such as `200:` load as ints; everything else expects
+    # the string keys a JSON document has.
+    pending = [document]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, dict):
+            if not all(isinstance(key, str) for key in node):
+                items = list(node.items())
+                node.clear()
+                node.update((key if isinstance(key, str) else json.dumps(key), value) for key, value in items)
+            pending.extend(value for value in node.values() if isinstance(value, (dict, list)))
+        elif isinstance(node, list):
+            pending.extend(value for value in node if isinstance(value, (dict, list)))
+    return document
+
+
+def _load_json(data):
+    if orjson is not None and not WIDE_INTEGER.search(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def parse_document(data, location=""):
+    data = decompress(data, location)
+    try:
+        with gc_paused():
+            if JSON_START.match(data):
+                return _load_json(data)
+            return _string_keys(yaml.load(data, Loader=YamlSpecLoader))
+    except (ValueError, yaml.YAMLError) as e:
+        raise SpecLoadError(f"Could not parse {location or 'spec'}: {e}") from e
+
+
+def _document_name(location, taken):
+    stem = os.path.basename(urlsplit(location).path) or "document"
+    stem = re.sub(r"\.(gz|zst)$", "", stem)
+    stem = re.sub(r"[^A-Za-z0-9_.-]", "_", os.path.splitext(stem)[0]) or "document"
+    name, suffix = stem, 1
+    while name in taken:
+        suffix += 1
+        name = f"{stem}_{suffix}"
+    return name
+
+
+def _ref_nodes(document):
+    seen, pending = set(), [document]
+    while pending:
+        node = pending.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, dict):
+            if isinstance(node.get("$ref"), str):
+                yield node
+            pending.extend(value for value in node.values() if isinstance(value, (dict, list)))
+        elif isinstance(node, list):
+            pending.extend(value for value in node if isinstance(value, (dict, list)))
+
+
+def bundle_external_refs(spec, location, data, read=read_location):
+    # Copies every document reachable through file or URL $refs under
+    # spec["x-external"][name] and rewrites the refs to local pointers, so the
+    # rest of the app only ever resolves refs within a single document.
+    if not EXTERNAL_REF.search(data):
+        return ()
+
+    pointers, external, sources = {location: ""}, {}, []
+    pending = [(spec, location, "")]
+    while pending:
+        document, document_location, prefix = pending.pop()
+        for node in _ref_nodes(document):
+            target, _, fragment = node["$ref"].partition("#")
+            if not target:
+                node["$ref"] = f"#{prefix}{fragment}"
+                continue
+
+            target_location = resolve_location(document_location, target)
+            if target_location not in pointers:
+                target_raw = read(target_location)
+                name = _document_name(target_location, external)
+                pointers[target_location] = f"/{EXTERNAL_KEY}/{name}"
+                external[name] = parse_document(target_raw, target_location)
+                sources.append((target_location, hashlib.sha256(target_raw).hexdigest()))
+                pending.append((external[name], target_location, pointers[target_location]))
+            node["$ref"] = f"#{pointers[target_location]}{fragment}"
+
+    if external:
+        spec.setdefault(EXTERNAL_KEY, {}).update(external)
+    return tuple(sources)
+
+
+def combined_hash(raw_hash, sources):
+    if not sources:
+        return raw_hash
+    return hashlib.sha256(":".join([raw_hash, *(digest for _, digest in sources)]).encode()).hexdigest()
+
+
+def _dump_json(value):
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=str)
+        except TypeError:
+            # Integers wider than 64 bits; json writes them exactly.
+            pass
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+
+class SpecDiskCache:
+    # Entries are plain JSON rather than pickles: the directory may be shared,
+    # and loading a planted file must not be able to run code.
+    def __init__(self, directory=SPEC_CACHE_DIR, max_bytes=SPEC_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, raw_hash):
+        return os.path.join(self.directory, f"{raw_hash}.json")
+
+    def load(self, raw_hash):
+        path = self._path(raw_hash)
+        try:
+            with open(path, "rb") as f:
+                entry = parse_document(f.read(), path)
+            os.utime(path)
+        except (OSError, SpecLoadError):
+            return None
+        if not isinstance(entry, dict) or entry.get("format") != CACHE_FORMAT or not isinstance(entry.get("spec"), dict):
+            return None
+        return tuple(tuple(source) for source in entry.get("sources", ())), entry["spec"]
+
+    def store(self, raw_hash, sources, spec):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(_dump_json({"format": CACHE_FORMAT, "sources": sources, "spec": spec}))
+            os.replace(temp_path, self._path(raw_hash))
+            self.prune(keep=self._path(raw_hash))
+        except OSError:
+            # The cache only saves parse time; a read-only checkout still loads specs.
+            pass
+
+    def prune(self, keep=None):
+        # Least recently used entries go first; load() refreshes an entry's mtime.
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_SUFFIXES) and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+_default_disk_cache = SpecDiskCache()
+
+
+def _sources_unchanged(sources, read):
+    try:
+        return all(hashlib.sha256(read(location)).hexdigest() == digest for location, digest in sources)
+    except (OSError, ValueError):
+        return False
+
+
+def load_spec(location, raw=None, read=read_location, disk_cache=_default_disk_cache):
+    if raw is None:
+        raw = read(location)
+    raw_hash = hashlib.sha256(raw).hexdigest()
+
+    cached = disk_cache.load(raw_hash) if disk_cache is not None else None
+    if cached is not None and _sources_unchanged(cached[0], read):
+        sources, spec = cached
+        return LoadedSpec(spec, combined_hash(raw_hash, sources), sources)
+
+    data = decompress(raw, location)
+    spec = parse_document(data, location)
+    if not isinstance(spec, dict):
+        raise SpecLoadError(f"{location} does not contain an OpenAPI document")
+    sources = bundle_external_refs(spec, location, data, read)
+    if disk_cache is not None:
+        disk_cache.store(raw_hash, sources, spec)
+    return LoadedSpec(spec, combined_hash(raw_hash, sources), sources)
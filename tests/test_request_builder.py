@@ -0,0 +1,94 @@
+import pytest
+
+from request_builder import UrlBuilder, build_full_url, serialize_path_value, serialize_query_value
+
+
+def path_param(name, style=None, explode=None, schema_type="string"):
+    param = {"name": name, "in": "path", "schema": {"type": schema_type}}
+    if style is not None:
+        param["style"] = style
+    if explode is not None:
+        param["explode"] = explode
+    return param
+
+
+def query_param(name, style=None, explode=None, schema_type="string"):
+    return dict(path_param(name, style, explode, schema_type), **{"in": "query"})
+
+
+@pytest.mark.parametrize("style, explode, value, expected", [
+    ("simple", False, 5, "5"),
+    ("simple", False, [3, 4, 5], "3,4,5"),
+    ("simple", False, {"role": "admin", "first": "Alex"}, "role,admin,first,Alex"),
+    ("simple", True, {"role": "admin", "first": "Alex"}, "role=admin,first=Alex"),
+    ("label", False, 5, ".5"),
+    ("label", False, [3, 4, 5], ".3,4,5"),
+    ("label", True, [3, 4, 5], ".3.4.5"),
+    ("matrix", False, 5, ";id=5"),
+    ("matrix", False, [3, 4, 5], ";id=3,4,5"),
+    ("matrix", True, [3, 4, 5], ";id=3;id=4;id=5"),
+    ("matrix", True, {"role": "admin", "first": "Alex"}, ";role=admin;first=Alex"),
+])
+def test_serialize_path_value(style, explode, value, expected):
+    assert serialize_path_value(style, explode, "id", value) == expected
+
+
+@pytest.mark.parametrize("style, explode, value, expected", [
+    ("form", True, 5, ["id=5"]),
+    ("form", True, [3, 4], ["id=3", "id=4"]),
+    ("form", False, [3, 4], ["id=3,4"]),
+    ("spaceDelimited", False, [3, 4], ["id=3%204"]),
+    ("pipeDelimited", False, [3, 4], ["id=3|4"]),
+    ("form", True, {"role": "admin", "first": "Alex"}, ["role=admin", "first=Alex"]),
+    ("form", False, {"role": "admin"}, ["id=role,admin"]),
+    ("deepObject", True, {"role": "admin", "first": "Alex"}, ["id[role]=admin", "id[first]=Alex"]),
+])
+def test_serialize_query_value(style, explode, value, expected):
+    parts = []
+    serialize_query_value(style, explode, "id", value, parts)
+    assert parts == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("plain-Value_1.~", "plain-Value_1.~"),
+    ("a b/c?d", "a%20b%2Fc%3Fd"),
+    ("100%", "100%25"),
+    ("café", "caf%C3%A9"),
+    (True, "true"),
+    (False, "false"),
+    (1.5, "1.5"),
+])
+def test_path_values_are_percent_encoded(value, expected):
+    assert UrlBuilder("/items/{id}", (path_param("id"),)).build_path({"id": value}) == f"/items/{expected}"
+
+
+def test_build_with_path_and_query():
+    builder = UrlBuilder("/users/{userId}/pets/{petId}", (
+        path_param("userId"),
+        path_param("petId", style="matrix"),
+        query_param("tags", schema_type="array"),
+        query_param("q"),
+    ))
+    url = builder.build({"userId": "u 1", "petId": 7}, {"tags": "a, b", "q": "x&y", "empty": "", "missing": None})
+    assert url == "/users/u%201/pets/;petId=7?tags=a&tags=b&q=x%26y"
+
+
+def test_array_path_parameter_splits_strings():
+    builder = UrlBuilder("/items/{ids}", (path_param("ids", schema_type="array"),))
+    assert builder.build_path({"ids": "1, 2,3"}) == "/items/1,2,3"
+
+
+def test_missing_path_parameter_keeps_placeholder():
+    assert UrlBuilder("/items/{id}/sub").build_path({}) == "/items/{id}/sub"
+
+
+def test_query_without_parameters_has_no_question_mark():
+    assert UrlBuilder("/items").build({}, {}) == "/items"
+
+
+def test_undeclared_query_parameter_names_are_encoded():
+    assert UrlBuilder("/items").build({}, {"a b": "c"}) == "/items?a%20b=c"
+
+
+def test_build_full_url_matches_builder():
+    assert build_full_url("/items/{id}", {"id": "a/b"}, {"page": 2}) == "/items/a%2Fb?page=2"
@@ -0,0 +1,149 @@
+import pytest
+
+from schema_validation import ValidatorCache, format_path, validate, validate_response
+
+
+def test_format_path():
+    assert format_path(None) == "$"
+    assert format_path((((None, "items"), 2), "name")) == "$.items[2].name"
+
+
+@pytest.mark.parametrize("schema_type, value, valid", [
+    ("string", "a", True),
+    ("string", 1, False),
+    ("integer", 3, True),
+    ("integer", 3.0, True),
+    ("integer", 3.5, False),
+    ("integer", True, False),
+    ("number", 1.5, True),
+    ("number", False, False),
+    ("boolean", True, True),
+    ("boolean", 0, False),
+    ("array", [], True),
+    ("object", {}, True),
+    ("null", None, True),
+])
+def test_types(schema_type, value, valid):
+    assert (validate({"type": schema_type}, value) == []) is valid
+
+
+def test_type_list_and_nullable():
+    assert validate({"type": ["string", "integer"]}, 1) == []
+    assert validate({"type": ["string", "integer"]}, 1.5) == [("$", "expected string or integer, got float")]
+    assert validate({"type": "string", "nullable": True}, None) == []
+
+
+@pytest.mark.parametrize("multiple, value", [(0.01, 0.07), (0.1, 0.3), (0.5, 3), (2, 8), (0.25, 1.75)])
+def test_multiple_of_accepts_exact_decimal_multiples(multiple, value):
+    assert validate({"type": "number", "multipleOf": multiple}, value) == []
+
+
+@pytest.mark.parametrize("multiple, value", [(0.1, 0.35), (2, 7), (0.01, 0.005)])
+def test_multiple_of_rejects(multiple, value):
+    assert validate({"type": "number", "multipleOf": multiple}, value) == [("$", f"not a multiple of {multiple}")]
+
+
+def test_number_bounds():
+    schema = {"type": "number", "minimum": 1, "maximum": 5, "exclusiveMaximum": 5}
+    assert validate(schema, 3) == []
+    assert validate(schema, 0) == [("$", "less than minimum 1")]
+    assert validate(schema, 5) == [("$", "not less than 5")]
+
+
+def test_string_constraints():
+    schema = {"type": "string", "minLength": 2, "maxLength": 4, "pattern": "^[a-z]+$"}
+    assert validate(schema, "abc") == []
+    assert validate(schema, "a") == [("$", "shorter than 2 characters")]
+    assert validate(schema, "ABCDE") == [
+        ("$", "longer than 4 characters"),
+        ("$", "does not match pattern '^[a-z]+$'"),
+    ]
+
+
+def test_array_items_and_uniqueness():
+    schema = {"type": "array", "items": {"type": "integer"}, "uniqueItems": True, "maxItems": 3}
+    assert validate(schema, [1, 2]) == []
+    assert validate(schema, [1, "x", 1, 4]) == [
+        ("$", "more than 3 items"),
+        ("$", "items are not unique"),
+        ("$[1]", "expected integer, got str"),
+    ]
+
+
+def test_object_properties():
+    schema = {
+        "type": "object",
+        "required": ["id"],
+        "properties": {"id": {"type": "integer"}, "tags": {"type": "array", "items": {"type": "string"}}},
+        "additionalProperties": False,
+    }
+    assert validate(schema, {"id": 1, "tags": ["a"]}) == []
+    assert validate(schema, {"tags": ["a", 2], "extra": True}) == [
+        ("$.id", "required property is missing"),
+        ("$.tags[1]", "expected string, got int"),
+        ("$.extra", "additional property is not allowed"),
+    ]
+
+
+def test_additional_properties_schema():
+    schema = {"type": "object", "additionalProperties": {"type": "integer"}}
+    assert validate(schema, {"a": 1}) == []
+    assert validate(schema, {"a": "x"}) == [("$.a", "expected integer, got str")]
+
+
+def test_enum_and_const():
+    assert validate({"enum": ["a", "b"]}, "c") == [("$", "'c' is not one of ['a', 'b']")]
+    assert validate({"const": 1}, 1) == []
+
+
+def test_combinators():
+    assert validate({"allOf": [{"type": "integer"}, {"minimum": 2}]}, 1) == [("$", "less than minimum 2")]
+    assert validate({"anyOf": [{"type": "string"}, {"type": "integer"}]}, 1.5) == [
+        ("$", "does not match any schema in anyOf")
+    ]
+    assert validate({"oneOf": [{"type": "integer"}, {"type": "number"}]}, 1) == [
+        ("$", "matches 2 schemas in oneOf, expected exactly 1")
+    ]
+    assert validate({"not": {"type": "string"}}, "a") == [("$", "matches a schema it must not match")]
+
+
+def test_recursive_schema():
+    node = {"type": "object", "properties": {"value": {"type": "integer"}}}
+    node["properties"]["children"] = {"type": "array", "items": node}
+    tree = {"value": 1, "children": [{"value": 2, "children": [{"value": "x"}]}]}
+    assert validate(node, tree) == [("$.children[0].children[0].value", "expected integer, got str")]
+
+
+def test_cache_compiles_each_schema_once():
+    cache = ValidatorCache()
+    schema = {"type": "integer"}
+    assert cache.get(schema) is cache.get(schema)
+
+
+def test_cache_evicts_oldest():
+    cache = ValidatorCache(max_entries=2)
+    schemas = [{"type": "integer"} for _ in range(3)]
+    first = cache.get(schemas[0])
+    cache.get(schemas[1])
+    cache.get(schemas[2])
+    assert cache.get(schemas[0]) is not first
+
+
+def test_validate_response():
+    responses = {
+        "200": {"content": {"application/json": {"schema": {"type": "object", "required": ["id"]}}}},
+        "4XX": {"content": {"application/problem+json": {"schema": {"type": "object"}}}},
+        "204": {"description": "no content"},
+    }
+    assert validate_response(responses, 200, {"id": 1}) == []
+    assert validate_response(responses, 200, {}) == [("$.id", "required property is missing")]
+    assert validate_response(responses, 404, [], "application/problem+json") == [("$", "expected object, got list")]
+    assert validate_response(responses, 204, None) is None
+    assert validate_response(responses, 500, {}) == [("$", "status 500 is not declared in the endpoint's responses")]
+    assert validate_response({}, 500, {}) is None
+
+
+def test_uncompilable_pattern_is_skipped():
+    schema = {"type": "string", "pattern": r"^\p{L}+$", "minLength": 2}
+    assert validate(schema, "héllo") == []
+    assert validate(schema, "h") == [("$", "shorter than 2 characters")]
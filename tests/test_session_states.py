@@ -0,0 +1,38 @@
+import asyncio
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+from streamlit.runtime.runtime import RuntimeConfig
+from streamlit.runtime.script_data import ScriptData
+
+from main import active_session_states
+
+
+class _Client:
+    def write_forward_msg(self, msg):
+        pass
+
+
+def test_active_session_states_lists_connected_sessions():
+    async def run():
+        runtime = Runtime(RuntimeConfig(
+            script_path="main.py",
+            command_line=None,
+            media_file_storage=MemoryMediaFileStorage("/media"),
+            uploaded_file_manager=MemoryUploadedFileManager("/upload"),
+        ))
+        try:
+            session_id = runtime._session_mgr.connect_session(
+                client=_Client(), script_data=ScriptData("main.py", ""), user_info={}, existing_session_id=None,
+            )
+            runtime._session_mgr.get_session_info(session_id).session.session_state["marker"] = 1
+            states = active_session_states()
+            runtime._session_mgr.close_session(session_id)
+            return session_id, states
+        finally:
+            Runtime._instance = None
+
+    session_id, states = asyncio.run(run())
+    assert list(states) == [session_id]
+    assert states[session_id]["marker"] == 1
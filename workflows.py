@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from urllib.parse import urljoin
+
+from http_client import AuthSettings, ConnectionSettings, get_session, send_request
+from instrumentation import track_request
+from openapi_manager import download_endpoint_index
+from request_builder import build_headers, prepare_request_body
+from service_policy import policy_gate
+from service_registry import load_service_registry
+
+COLLECTIONS_DIR = os.environ.get(
+    "API_TESTER_COLLECTIONS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "collections")
+)
+DEFAULT_WORKERS = 8
+
+COLLECTION_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+VARIABLE_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][\w.-]*)\s*\}\}")
+JSON_PATH_TOKEN = re.compile(r"\.([A-Za-z_$][\w$-]*)|\[(\d+|\*)\]|\[['\"](.+?)['\"]\]|\.(\*)")
+
+
+class WorkflowError(Exception):
+    pass
+
+
+@dataclass
+class StepResult:
+    step_id: str
+    status: str
+    status_code: int = None
+    latency_ms: float = None
+    extracted: dict = field(default_factory=dict)
+    error: str = None
+
+
+def list_collections(directory=COLLECTIONS_DIR):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def collection_path(name, directory=COLLECTIONS_DIR):
+    # Names come from the UI on a shared server, so they must not reach files
+    # outside the collections directory.
+    if not COLLECTION_NAME.fullmatch(name or "") or ".." in name:
+        raise WorkflowError(f"Invalid collection name {name!r}: use letters, digits, '_', '-' and '.'")
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, f"{name}.json"))
+    if os.path.dirname(path) != root:
+        raise WorkflowError(f"Invalid collection name {name!r}")
+    return path
+
+
+def load_collection(name, directory=COLLECTIONS_DIR):
+    with open(collection_path(name, directory)) as f:
+        return json.load(f)
+
+
+def save_collection(name, collection, directory=COLLECTIONS_DIR):
+    path = collection_path(name, directory)
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(collection, f, indent=2)
+
+
+def extract_json_path(data, expression):
+    if not expression.startswith("$"):
+        raise WorkflowError(f"JSONPath must start with '$': {expression}")
+
+    matches = [data]
+    position = 1
+    while position < len(expression):
+        token = JSON_PATH_TOKEN.match(expression, position)
+        if token is None:
+            raise WorkflowError(f"Unsupported JSONPath syntax at {expression[position:]!r}")
+        position = token.end()
+        name, index, quoted, star = token.groups()
+        wildcard = index == "*" or star == "*"
+
+        next_matches = []
+        for node in matches:
+            if wildcard:
+                next_matches.extend(node.values() if isinstance(node, dict) else node if isinstance(node, list) else [])
+            elif index is not None:
+                if isinstance(node, list) and int(index) < len(node):
+                    next_matches.append(node[int(index)])
+            elif isinstance(node, dict) and (name or quoted) in node:
+                next_matches.append(node[name or quoted])
+        matches = next_matches
+
+    if not matches:
+        raise WorkflowError(f"No match for {expression}")
+    return matches if "*" in expression else matches[0]
+
+
+def referenced_variables(value):
+    if isinstance(value, str):
+        return set(VARIABLE_PATTERN.findall(value))
+    if isinstance(value, dict):
+        return set().union(*(referenced_variables(v) for v in value.values())) if value else set()
+    if isinstance(value, list):
+        return set().union(*(referenced_variables(v) for v in value)) if value else set()
+    return set()
+
+
+def substitute(value, variables):
+    if isinstance(value, str):
+        whole = VARIABLE_PATTERN.fullmatch(value.strip())
+        if whole:
+            return variables[whole.group(1)]
+        return VARIABLE_PATTERN.sub(lambda m: str(variables[m.group(1)]), value)
+    if isinstance(value, dict):
+        return {k: substitute(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute(v, variables) for v in value]
+    return value
+
+
+def step_dependencies(steps):
+    producers = {}
+    for step in steps:
+        for variable in step.get("extract", {}):
+            producers[variable] = step["id"]
+
+    dependencies = {}
+    for step in steps:
+        inputs = {key: step.get(key) for key in ("path_params", "query_params", "headers", "body")}
+        needed = {producers[v] for v in referenced_variables(inputs) if v in producers}
+        needed.update(step.get("depends_on", []))
+        needed.discard(step["id"])
+        dependencies[step["id"]] = needed
+
+    visiting, visited = set(), set()
+
+    def visit(step_id):
+        if step_id in visited:
+            return
+        if step_id in visiting:
+            raise WorkflowError(f"Dependency cycle through step '{step_id}'")
+        visiting.add(step_id)
+        for dependency in dependencies.get(step_id, ()):
+            if dependency not in dependencies:
+                raise WorkflowError(f"Step '{step_id}' depends on unknown step '{dependency}'")
+            visit(dependency)
+        visiting.discard(step_id)
+        visited.add(step_id)
+
+    for step_id in dependencies:
+        visit(step_id)
+    return dependencies
+
+
+class WorkflowRunner:
+    def __init__(self, session, endpoint_index, base_url, partition_id="", max_workers=DEFAULT_WORKERS, timeout=30,
+                 gate=None):
+        self.session = session
+        self.gate = gate
+        self.endpoint_index = endpoint_index
+        self.base_url = base_url
+        self.partition_id = partition_id
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def run_step(self, step, variables):
+        endpoint = self.endpoint_index.by_operation_id.get(step["operation_id"])
+        if endpoint is None:
+            raise WorkflowError(f"Unknown operationId '{step['operation_id']}'")
+
+        path_params = substitute(step.get("path_params", {}), variables)
+        query_params = substitute(step.get("query_params", {}), variables)
+        headers = build_headers(substitute(step.get("headers", {}), variables), self.partition_id)
+        json_data = substitute(step.get("body"), variables)
+        if isinstance(json_data, dict) and step.get("coerce_body", True):
+            json_data = prepare_request_body(json_data, endpoint)
+
+        url = urljoin(self.base_url, endpoint.url_builder.build(path_params, query_params))
+        with track_request() as timing:
+            response = send_request(self.session, endpoint.method, url, headers, json_data, timeout=self.timeout,
+                                    gate=self.gate)
+        timing.finish(0)
+        latency_ms = timing.total_ms
+
+        result = StepResult(step["id"], "passed", status_code=response.status_code, latency_ms=latency_ms)
+        expected = step.get("expect_status")
+        if expected is not None and response.status_code not in (expected if isinstance(expected, list) else [expected]):
+            result.status, result.error = "failed", f"Expected status {expected}, got {response.status_code}"
+            return result
+        if expected is None and response.status_code >= 400:
+            result.status, result.error = "failed", f"Request failed with status {response.status_code}"
+            return result
+
+        if step.get("extract"):
+            payload = response.json()
+            result.extracted = {name: extract_json_path(payload, path) for name, path in step["extract"].items()}
+        return result
+
+    def run(self, collection):
+        steps = collection.get("steps", [])
+        steps_by_id = {step["id"]: step for step in steps}
+        if len(steps_by_id) != len(steps):
+            raise WorkflowError("Step ids must be unique")
+        dependencies = step_dependencies(steps)
+
+        variables = dict(collection.get("variables", {}))
+        variables_lock = threading.Lock()
+        results = {}
+        remaining = dict(dependencies)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while remaining or running:
+                for step_id, needed in list(remaining.items()):
+                    if any(results[d].status != "passed" for d in needed if d in results):
+                        results[step_id] = StepResult(step_id, "skipped", error="A dependency did not pass")
+                        del remaining[step_id]
+                    elif all(d in results for d in needed):
+                        with variables_lock:
+                            snapshot = dict(variables)
+                        running[pool.submit(self.run_step, steps_by_id[step_id], snapshot)] = step_id
+                        del remaining[step_id]
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step_id = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = StepResult(step_id, "failed", error=str(e))
+                    if result.extracted:
+                        with variables_lock:
+                            variables.update(result.extracted)
+                    results[step_id] = result
+
+        return [results[step["id"]] for step in steps], variables
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a saved request collection against a deployment.")
+    parser.add_argument("collection", help="Collection name in the collections directory, or a path to a JSON file")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--partition-id", default="")
+    parser.add_argument("--token", default="")
+    parser.add_argument("--auth-method", choices=["header", "cookie"], default="header")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if os.path.isfile(args.collection):
+        with open(args.collection) as f:
+            collection = json.load(f)
+    else:
+        collection = load_collection(args.collection)
+
+    service = load_service_registry()[collection["service"]]
+    runner = WorkflowRunner(
+        get_session(args.base_url, ConnectionSettings(pool_size=args.workers), AuthSettings(args.auth_method, args.token),
+                    gated=service.policy.enabled),
+        download_endpoint_index(service, args.base_url),
+        args.base_url,
+        partition_id=args.partition_id,
+        max_workers=args.workers,
+        gate=policy_gate(service.name, service.policy, args.base_url),
+    )
+    results, _ = runner.run(collection)
+    for result in results:
+        latency = f"{result.latency_ms:.1f} ms" if result.latency_ms is not None else "-"
+        print(f"{result.status:8} {result.step_id:24} {result.status_code or '-':>5} {latency:>10} {result.error or ''}")
+    return 0 if all(result.status == "passed" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())